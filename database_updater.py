@@ -3,18 +3,20 @@
 #   Сохраняющим прогнозы в базу данных (использовать peewee)
 
 import pathlib
-from datetime import datetime
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import datetime, timedelta
 import peewee
-import weather_maker
+import weather_conditions
+from forecast import Forecast
 
 DATE_FORMAT = '%d.%m.%Y'
 DB_PATH = pathlib.Path().absolute() / 'db'
 DB_FILE = DB_PATH / 'Weather.db'
 
-if not pathlib.Path.is_dir(DB_PATH):
-    pathlib.Path.mkdir(DB_PATH)
-
-db_handler = peewee.SqliteDatabase(database=DB_FILE)
+PARTITION_NONE = None
+PARTITION_YEAR = 'year'
+PARTITION_CITY = 'city'
 
 
 class DuplicateKeyError(Exception):
@@ -25,16 +27,180 @@ class NotNullValueError(Exception):
     pass
 
 
+class QueryCache:
+    """
+    Ограниченный LRU-кэш результатов чтения прогнозов за период.
+    Ключ - (str(city_id), since_date, until_date), значение - словарь {date: Forecast}.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        Возвращает закэшированное значение или None, обновляя статистику
+
+        :param tuple key: (city_id, since_date, until_date)
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, city_id, wdate):
+        """
+        Удаляет записи, диапазон которых содержит дату wdate в городе city_id
+
+        :type city_id: str
+        :type wdate: datetime.date
+        """
+        for key in [k for k in self._entries if k[0] == city_id and k[1] <= wdate <= k[2]]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """ Статистика обращений: попадания, промахи, доля попаданий и текущий размер """
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries), 'maxsize': self.maxsize}
+
+
+def bind_model(model, database):
+    """
+    Копия модели model, привязанная к database. Исходная модель не изменяется,
+    поэтому разные экземпляры WeatherDatabase и разные файлы БД не влияют друг на друга.
+
+    :param model: Класс модели таблицы
+    :param peewee.SqliteDatabase database: БД
+    """
+    meta = type('Meta', (), {'database': database, 'table_name': model._meta.table_name})
+    return type(model.__name__, (model, ), {'Meta': meta, '__module__': model.__module__})
+
+
+class ShardRouter:
+    """
+    Маршрутизатор файлов БД.
+    Без разбиения все данные хранятся в одном файле 'Weather.db'.
+    При разбиении по годам - 'Weather_<год>.db', по группам городов - 'Weather_city<группа>.db'.
+    """
+    PRAGMAS = {'journal_mode': 'wal', 'synchronous': 'normal', 'busy_timeout': 5000}
+
+    def __init__(self, db_path=DB_PATH, partition=PARTITION_NONE, city_groups=16, thread_safe=True):
+        if partition not in (PARTITION_NONE, PARTITION_YEAR, PARTITION_CITY):
+            raise ValueError(f'Неизвестный способ разбиения: {partition}')
+        self.db_path = pathlib.Path(db_path)
+        self.partition = partition
+        self.city_groups = city_groups
+        self.thread_safe = thread_safe
+        self._databases = dict()  # {'Weather_2020.db': <class 'peewee.SqliteDatabase'>, ...}
+        self._models = dict()  # {('Weather_2020.db', WeatherTable): модель, привязанная к файлу}
+        if not pathlib.Path.is_dir(self.db_path):
+            pathlib.Path.mkdir(self.db_path, parents=True)
+
+    def _city_group(self, city_id):
+        try:
+            return int(city_id) % self.city_groups
+        except ValueError:
+            return 0
+
+    def shard_name(self, city_id, wdate):
+        """
+        Имя файла БД, в котором хранится запись города city_id за дату wdate
+
+        :type city_id: int
+        :type wdate: datetime.date
+        """
+        if self.partition == PARTITION_YEAR:
+            return f'Weather_{wdate.year}.db'
+        elif self.partition == PARTITION_CITY:
+            return f'Weather_city{self._city_group(city_id):02d}.db'
+        return DB_FILE.name
+
+    def range_shards(self, city_id, since_date, until_date):
+        """
+        Имена существующих файлов БД, содержащих записи города city_id за диапазон дат
+
+        :type city_id: int
+        :type since_date: datetime.date
+        :type until_date: datetime.date
+        :rtype: list
+        """
+        if self.partition == PARTITION_YEAR:
+            names = [f'Weather_{year}.db' for year in range(since_date.year, until_date.year + 1)]
+        else:
+            names = [self.shard_name(city_id=city_id, wdate=since_date)]
+        return [name for name in names if name in self._databases or (self.db_path / name).is_file()]
+
+    def all_shards(self):
+        """ Имена всех существующих файлов БД с таблицей погоды """
+        if self.partition == PARTITION_NONE:
+            names = [DB_FILE.name]
+        else:
+            names = sorted(path.name for path in self.db_path.glob('Weather_*.db'))
+        return [name for name in names if name in self._databases or (self.db_path / name).is_file()]
+
+    def database(self, name):
+        """
+        Соединение с файлом БД name
+
+        :param str name: Имя файла БД
+        :rtype: peewee.SqliteDatabase
+        """
+        if name not in self._databases:
+            options = dict() if self.thread_safe else dict(thread_safe=False, check_same_thread=False)
+            self._databases[name] = peewee.SqliteDatabase(database=self.db_path / name, pragmas=self.PRAGMAS,
+                                                          **options)
+        return self._databases[name]
+
+    def model(self, name, model):
+        """
+        Модель таблицы, привязанная к файлу БД name. При первом обращении таблица создается в этом файле
+
+        :param str name: Имя файла БД
+        :param model: Класс модели таблицы
+        """
+        key = (name, model)
+        if key not in self._models:
+            bound = bind_model(model=model, database=self.database(name=name))
+            bound.create_table()
+            self._models[key] = bound
+        return self._models[key]
+
+    def close(self):
+        for database in self._databases.values():
+            database.close()
+        self._databases.clear()
+        self._models.clear()
+
+
 class BaseModel(peewee.Model):
-    """ Базовый класс модели таблиц """
-    class Meta:
-        database = db_handler
+    """ Базовый класс модели таблиц. К файлу БД модели привязывает ShardRouter.model """
 
 
 class WeatherDatabase:
     """
     Класс работы с БД SQLite.
     По умолчанию 'Weather.db' создается в подкаталоге db каталога запуска скрипта.
+    Параметр partition позволяет разбить таблицу погоды на несколько файлов по годам (PARTITION_YEAR)
+    или по группам городов (PARTITION_CITY): запись и чтение направляются в нужный файл,
+    а запросы за диапазон дат объединяют результаты всех затронутых файлов.
+    Модели таблиц класса не привязаны к БД: каждый экземпляр работает с собственными копиями моделей.
     """
 
     class WeatherTable(BaseModel):
@@ -48,39 +214,319 @@ class WeatherDatabase:
         wdate = peewee.DateField()
         max_temp = peewee.SmallIntegerField()
         min_temp = peewee.SmallIntegerField()
-        cloudiness = peewee.TextField()
-        precipitations = peewee.TextField(null=True)
+        cloudiness = peewee.SmallIntegerField(index=True)  # код ConditionTable
+        precipitations = peewee.SmallIntegerField(null=True, index=True)  # код ConditionTable
+
+    class ConditionTable(BaseModel):
+        """ Справочник состояний погоды: код и подпись облачности/осадков """
+        class Meta:
+            db_table = 'condition'
+
+        code = peewee.SmallIntegerField(primary_key=True)
+        label = peewee.TextField(unique=True)
+
+    class BackfillTable(BaseModel):
+        """ Контрольные точки загрузки истории: завершенные месяцы по городам """
+        class Meta:
+            db_table = 'backfill'
+            primary_key = peewee.CompositeKey('city_id', 'year', 'month')
 
-    def __init__(self):
-        self.db = db_handler
-        self.db.create_tables([self.WeatherTable])
+        city_id = peewee.IntegerField()
+        year = peewee.SmallIntegerField()
+        month = peewee.SmallIntegerField()
+        rows = peewee.SmallIntegerField()
+        done_at = peewee.DateTimeField(default=datetime.now)
+
+    class ClimateTable(BaseModel):
+        """ Помесячные и годовые (month = 0) сводные показатели погоды по городам """
+        class Meta:
+            db_table = 'climate'
+            primary_key = peewee.CompositeKey('city_id', 'year', 'month')
+
+        city_id = peewee.IntegerField()
+        year = peewee.SmallIntegerField()
+        month = peewee.SmallIntegerField()
+        days = peewee.SmallIntegerField()
+        max_temp_sum = peewee.IntegerField()
+        min_temp_sum = peewee.IntegerField()
+        max_temp_record = peewee.SmallIntegerField()
+        min_temp_record = peewee.SmallIntegerField()
+        precip_days = peewee.SmallIntegerField()
+
+    def __init__(self, cache_size=128, db_path=DB_PATH, partition=PARTITION_NONE, city_groups=16, thread_safe=True):
+        """
+        :param int cache_size: Размер кэша чтения
+        :param db_path: Каталог файлов БД
+        :param partition: Способ разбиения таблицы погоды на файлы
+        :param int city_groups: Количество групп городов при разбиении PARTITION_CITY
+        :param bool thread_safe: Отдельное соединение с БД в каждом потоке. False - одно общее соединение
+                                 для всех потоков; доступ к БД тогда должен быть последовательным
+        """
+        self.router = ShardRouter(db_path=db_path, partition=partition, city_groups=city_groups,
+                                  thread_safe=thread_safe)
+        self.db = self.router.database(name=DB_FILE.name)
+        self.ConditionTable = self.router.model(name=DB_FILE.name, model=WeatherDatabase.ConditionTable)
+        self.BackfillTable = self.router.model(name=DB_FILE.name, model=WeatherDatabase.BackfillTable)
+        self.cache = QueryCache(maxsize=cache_size)
+        self._init_conditions()
+        for name in self.router.all_shards():
+            self._migrate_conditions(name=name)
+            if not self._climate(name=name).select().exists():
+                self._refresh_climate(self._stored_months(name=name))
+
+    def _init_conditions(self):
+        """ Заполняет справочник известными состояниями погоды и загружает его в память """
+        self.ConditionTable \
+            .insert_many([{'code': code, 'label': label} for code, label in weather_conditions.LABELS.items()]) \
+            .on_conflict_ignore() \
+            .execute()
+        self._condition_labels = dict(self.ConditionTable.select(self.ConditionTable.code,
+                                                                 self.ConditionTable.label).tuples())
+        self._condition_codes = {label: code for code, label in self._condition_labels.items()}
+
+    def _migrate_conditions(self, name):
+        """
+        Переводит таблицу погоды файла БД name со старого текстового формата облачности и осадков на коды справочника
+
+        :param str name: Имя файла БД
+        """
+        database = self.router.database(name=name)
+        columns = {column.name: column.data_type for column in database.get_columns('weather')}
+        if columns.get('cloudiness', '').upper() != 'TEXT':
+            return
+        Weather = bind_model(model=WeatherDatabase.WeatherTable, database=database)
+        with database.atomic():
+            database.execute_sql('ALTER TABLE weather RENAME TO weather_legacy')
+            Weather.create_table()
+            cursor = database.execute_sql('SELECT city_id, city, city_translit, wdate, max_temp, min_temp, '
+                                          'cloudiness, precipitations FROM weather_legacy')
+            rows = ({'city_id': city_id, 'city': city, 'city_translit': city_translit, 'wdate': wdate,
+                     'max_temp': max_temp, 'min_temp': min_temp,
+                     'cloudiness': self.condition_code(cloudiness),
+                     'precipitations': self.condition_code(precipitations)}
+                    for city_id, city, city_translit, wdate, max_temp, min_temp, cloudiness, precipitations in cursor)
+            for batch in peewee.chunked(rows, 100):
+                Weather.insert_many(batch).execute()
+            database.execute_sql('DROP TABLE weather_legacy')
+        database.execute_sql('VACUUM')
+
+    def condition_code(self, label):
+        """
+        Код состояния погоды по подписи. Неизвестные подписи добавляются в справочник.
+        Код новой подписи выбирает сама БД в том же запросе INSERT OR IGNORE, поэтому процессы,
+        одновременно пишущие в одну БД, не получают одинаковые коды
+
+        :param str label: Подпись облачности или осадков
+        :rtype: int
+        """
+        if label is None:
+            return None
+        if isinstance(label, int):
+            return label
+        label = weather_conditions.normalize(label)
+        if not label:
+            return None
+        try:
+            return self._condition_codes[label]
+        except KeyError:
+            Condition = self.ConditionTable
+            next_code = Condition.select(peewee.fn.MAX(peewee.fn.MAX(Condition.code) + 1,
+                                                       weather_conditions.CUSTOM_CODES_START),
+                                         peewee.Value(label))
+            Condition.insert_from(next_code, [Condition.code, Condition.label]).on_conflict_ignore().execute()
+            code = Condition.select(Condition.code).where(Condition.label == label).scalar()
+            self._condition_codes[label] = code
+            self._condition_labels[code] = label
+            return code
+
+    def find_condition_code(self, label):
+        """
+        Код состояния погоды по подписи без добавления в справочник
+
+        :param label: Код или подпись облачности или осадков
+        :return int: Код или None, если подпись неизвестна
+        """
+        if label is None or isinstance(label, int):
+            return label
+        label = weather_conditions.normalize(label)
+        if label in self._condition_codes:
+            return self._condition_codes[label]
+        Condition = self.ConditionTable
+        code = Condition.select(Condition.code).where(Condition.label == label).scalar()
+        if code is not None:
+            self._condition_codes[label] = code
+            self._condition_labels[code] = label
+        return code
+
+    def condition_label(self, code):
+        """
+        Подпись состояния погоды по коду. Код, добавленный в справочник другим процессом, читается из БД
+
+        :param int code: Код справочника состояний погоды
+        :rtype: str
+        """
+        if code is None or code in self._condition_labels:
+            return self._condition_labels.get(code)
+        Condition = self.ConditionTable
+        label = Condition.select(Condition.label).where(Condition.code == code).scalar()
+        if label is not None:
+            self._condition_labels[code] = label
+            self._condition_codes[label] = code
+        return label
+
+    def _weather(self, name):
+        """ Таблица погоды файла БД name """
+        return self.router.model(name=name, model=WeatherDatabase.WeatherTable)
+
+    def _shard(self, city_id, wdate):
+        """ Таблица погоды файла БД с записью города city_id за дату wdate """
+        return self._weather(name=self.router.shard_name(city_id=city_id, wdate=wdate))
+
+    def _climate(self, name):
+        """
+        Таблица сводных показателей файла БД name. Показатели хранятся в одном файле с записями погоды,
+        по которым они посчитаны: запись в разные файлы не ждет блокировки общего файла
+        """
+        return self.router.model(name=name, model=WeatherDatabase.ClimateTable)
 
     def weather_insert_row(self, city_id, city, city_translit, wdate, max_temp, min_temp, cloudiness, precipitations):
         """
         Добавление записи в таблицу погоды. Если запись за дату существует, обновляет показатели.
         """
+        Weather = self._shard(city_id=city_id, wdate=wdate)
+        cloudiness, precipitations = self.condition_code(cloudiness), self.condition_code(precipitations)
         try:
-            self.WeatherTable.create(city_id=city_id, city=city, city_translit=city_translit, wdate=wdate,
-                                     max_temp=max_temp, min_temp=min_temp,
-                                     cloudiness=cloudiness, precipitations=precipitations)
+            Weather.create(city_id=city_id, city=city, city_translit=city_translit, wdate=wdate,
+                           max_temp=max_temp, min_temp=min_temp, cloudiness=cloudiness, precipitations=precipitations)
         except peewee.IntegrityError as exc:
             if 'UNIQUE constraint failed' in exc.args[0]:
                 raise DuplicateKeyError
             elif 'NOT NULL constraint failed' in exc.args[0]:
                 raise NotNullValueError
+        self.cache.invalidate(str(city_id), wdate)
+        self._refresh_climate({(city_id, wdate.year, wdate.month)})
 
     def weather_update_row(self, city_id, wdate, max_temp, min_temp, cloudiness, precipitations):
         """
         Добавление записи в таблицу погоды. Если запись за дату существует, обновляет показатели.
         """
+        Weather = self._shard(city_id=city_id, wdate=wdate)
+        cloudiness, precipitations = self.condition_code(cloudiness), self.condition_code(precipitations)
         try:
-            self.WeatherTable \
+            Weather \
                 .update(max_temp=max_temp, min_temp=min_temp, cloudiness=cloudiness, precipitations=precipitations) \
-                .where(self.WeatherTable.city_id == city_id, self.WeatherTable.wdate == wdate) \
+                .where(Weather.city_id == city_id, Weather.wdate == wdate) \
                 .execute()
         except peewee.IntegrityError as exc:
             if 'NOT NULL constraint failed' in exc.args[0]:
                 raise NotNullValueError
+        self.cache.invalidate(str(city_id), wdate)
+        self._refresh_climate({(city_id, wdate.year, wdate.month)})
+
+    def weather_upsert_rows(self, rows):
+        """
+        Пакетная вставка записей в таблицу погоды. Существующие записи заменяются.
+        Записи группируются по файлам БД, в каждый файл пишется одной транзакцией.
+        Записи с незаполненными обязательными полями пропускаются.
+
+        :param list rows: Список словарей с полями таблицы погоды
+        """
+        rows = [dict(row, cloudiness=self.condition_code(row['cloudiness']),
+                     precipitations=self.condition_code(row.get('precipitations')))
+                for row in rows if row.get('max_temp') is not None and row.get('min_temp') is not None
+                and row.get('cloudiness') is not None]
+        shards = dict()
+        for row in rows:
+            shards.setdefault(self.router.shard_name(city_id=row['city_id'], wdate=row['wdate']), []).append(row)
+        for name, shard_rows in shards.items():
+            Weather = self._weather(name=name)
+            with Weather._meta.database.atomic():
+                Weather.insert_many(shard_rows).on_conflict_replace().execute()
+        for row in rows:
+            self.cache.invalidate(str(row['city_id']), row['wdate'])
+        self._refresh_climate({(row['city_id'], row['wdate'].year, row['wdate'].month) for row in rows})
+
+    def backfill_done(self, city_ids):
+        """
+        Завершенные единицы загрузки истории городов city_ids
+
+        :param list city_ids: Идентификаторы городов
+        :return set: Множество кортежей (city_id, year, month)
+        """
+        Backfill = self.BackfillTable
+        return set(Backfill
+                   .select(Backfill.city_id, Backfill.year, Backfill.month)
+                   .where(Backfill.city_id.in_([int(city_id) for city_id in city_ids]))
+                   .tuples())
+
+    def backfill_commit(self, city_id, year, month, rows, done=True):
+        """
+        Сохраняет записи месяца истории города и отмечает месяц завершенным.
+        Если записи и контрольные точки хранятся в одном файле БД, это одна транзакция.
+        Иначе записи фиксируются до отметки: после сбоя месяц будет загружен повторно,
+        а повторная вставка заменит те же строки.
+
+        :param int city_id: Идентификатор города
+        :param int year: Год
+        :param int month: Месяц
+        :param list rows: Список словарей с полями таблицы погоды
+        :param bool done: Отметить месяц завершенным. Для неполного месяца False: записи сохраняются,
+                          а остальные дни месяца будут загружены при следующем запуске
+        """
+        single_file = self.router.partition == PARTITION_NONE
+        with (self.db.atomic() if single_file else nullcontext()):
+            self.weather_upsert_rows(rows)
+            if done:
+                self.BackfillTable.replace(city_id=city_id, year=year, month=month, rows=len(rows)).execute()
+
+    def _refresh_climate(self, months):
+        """
+        Пересчитывает сводные показатели только для затронутых записью месяцев и их годов.
+        Месяц пересчитывается по своим (не более 31) строкам таблицы погоды, год - по 12 строкам месяцев.
+        Все месяцы года города хранятся в одном файле БД, поэтому там же хранятся и их сводные показатели.
+
+        :param set months: Множество кортежей (city_id, year, month)
+        """
+        for city_id, year, month in months:
+            since_date = datetime(year=year, month=month, day=1).date()
+            until_date = (datetime(year=year + month // 12, month=month % 12 + 1, day=1) - timedelta(1)).date()
+            name = self.router.shard_name(city_id=city_id, wdate=since_date)
+            Weather, Climate = self._weather(name=name), self._climate(name=name)
+            stats = Weather \
+                .select(peewee.fn.COUNT(Weather.wdate).alias('days'),
+                        peewee.fn.SUM(Weather.max_temp).alias('max_temp_sum'),
+                        peewee.fn.SUM(Weather.min_temp).alias('min_temp_sum'),
+                        peewee.fn.MAX(Weather.max_temp).alias('max_temp_record'),
+                        peewee.fn.MIN(Weather.min_temp).alias('min_temp_record'),
+                        peewee.fn.SUM(peewee.Case(None, [(Weather.precipitations.is_null(False), 1)], 0))
+                        .alias('precip_days')) \
+                .where(Weather.city_id == city_id, Weather.wdate.between(since_date, until_date)) \
+                .dicts() \
+                .get()
+            with Climate._meta.database.atomic():
+                if stats['days']:
+                    Climate.replace(city_id=city_id, year=year, month=month, **stats).execute()
+                else:
+                    Climate.delete().where(Climate.city_id == city_id, Climate.year == year,
+                                           Climate.month == month).execute()
+        for city_id, year in {(city_id, year) for city_id, year, _ in months}:
+            Climate = self._climate(name=self.router.shard_name(city_id=city_id, wdate=datetime(year, 1, 1).date()))
+            stats = Climate \
+                .select(peewee.fn.SUM(Climate.days).alias('days'),
+                        peewee.fn.SUM(Climate.max_temp_sum).alias('max_temp_sum'),
+                        peewee.fn.SUM(Climate.min_temp_sum).alias('min_temp_sum'),
+                        peewee.fn.MAX(Climate.max_temp_record).alias('max_temp_record'),
+                        peewee.fn.MIN(Climate.min_temp_record).alias('min_temp_record'),
+                        peewee.fn.SUM(Climate.precip_days).alias('precip_days')) \
+                .where(Climate.city_id == city_id, Climate.year == year, Climate.month > 0) \
+                .dicts() \
+                .get()
+            with Climate._meta.database.atomic():
+                if stats['days']:
+                    Climate.replace(city_id=city_id, year=year, month=0, **stats).execute()
+                else:
+                    Climate.delete().where(Climate.city_id == city_id, Climate.year == year,
+                                           Climate.month == 0).execute()
 
     def get_day_weather(self, city_id, wdate):
         """
@@ -88,44 +534,151 @@ class WeatherDatabase:
 
         :type city_id: int
         :type wdate: datetime.date
-        :rtype: peewee.ModelSelect
+        :rtype: list
         """
-        return self.WeatherTable\
-                   .select()\
-                   .where(self.WeatherTable.wdate == wdate,
-                          self.WeatherTable.city_id == city_id)
+        Weather = self._shard(city_id=city_id, wdate=wdate)
+        return list(Weather
+                    .select()
+                    .where(Weather.wdate == wdate,
+                           Weather.city_id == city_id))
 
-    def get_period_weather(self, city_id, since_date, until_date):
+    def get_period_weather(self, city_id, since_date, until_date, condition=None):
         """
         Выбрать запись за диапазон дат с since_date по until_date в городе city_id
 
         :type city_id: int
         :type since_date: datetime.date
         :type until_date: datetime.date
-        :rtype: peewee.ModelSelect
+        :param condition: Код или подпись состояния погоды - только дни с такой облачностью или осадками
+        :rtype: list
+        """
+        code = None
+        if condition is not None:
+            code = self.find_condition_code(condition)
+            if code is None:
+                return []
+        rows = []
+        for name in self.router.range_shards(city_id=city_id, since_date=since_date, until_date=until_date):
+            Weather = self._weather(name=name)
+            where = [Weather.wdate.between(since_date, until_date), Weather.city_id == city_id]
+            if condition is not None:
+                where.append((Weather.cloudiness == code) | (Weather.precipitations == code))
+            rows.extend(Weather
+                        .select()
+                        .where(*where)
+                        .order_by(Weather.wdate))
+        return rows
+
+    def get_period_forecasts(self, city_id, since_date, until_date) -> dict:
+        """
+        Прогнозы за диапазон дат с since_date по until_date в городе city_id через кэш чтения.
+        В кэше хранятся неизменяемые кортежи значений строк, объекты Forecast создаются заново при каждом вызове,
+        поэтому изменение полученных прогнозов не затрагивает кэш.
+
+        :type city_id: int
+        :type since_date: datetime.date
+        :type until_date: datetime.date
+        :return dict: Словарь прогнозов: {<class 'datetime.date'>: <class 'Forecast'>, ...}
+        """
+        key = (str(city_id), since_date, until_date)
+        rows = self.cache.get(key)
+        if rows is None:
+            rows = tuple((row.city, row.city_translit, row.wdate, row.max_temp, row.min_temp,
+                          row.cloudiness, row.precipitations)
+                         for row in self.get_period_weather(city_id=city_id, since_date=since_date,
+                                                            until_date=until_date))
+            self.cache.put(key, rows)
+        return {values[2]: self.values_to_forecast(*values) for values in rows}
+
+    def find_city(self, needle_city):
+        """
+        Поиск города среди сохраненных записей
+
+        :param str needle_city: Строка искомого города
+        :return tuple: (city_id, city) или None, если записей по городу нет
         """
-        return self.WeatherTable\
-                   .select() \
-                   .where(self.WeatherTable.wdate.between(since_date, until_date),
-                          self.WeatherTable.city_id == city_id) \
-                   .order_by(self.WeatherTable.wdate)
+        needle_city = needle_city.strip().strip('"').upper()
+        for name in self.router.all_shards():
+            Weather = self._weather(name=name)
+            for city_id, city in Weather.select(Weather.city_id, Weather.city).distinct().tuples():
+                if city.upper() == needle_city:
+                    return city_id, city
 
-    @staticmethod
-    def row_to_forecast(row):
+    def rebuild_climate(self):
+        """
+        Полный пересчет сводных показателей по всем записям таблицы погоды.
+        Выполняется автоматически для файлов БД с записями погоды, но без сводных показателей
+        """
+        for name in self.router.all_shards():
+            self._refresh_climate(self._stored_months(name=name))
+
+    def _stored_months(self, name):
+        """
+        Месяцы, за которые в файле БД name есть записи погоды
+
+        :param str name: Имя файла БД
+        :return set: Множество кортежей (city_id, year, month)
+        """
+        Weather = self._weather(name=name)
+        return {tuple(int(value) for value in row)
+                for row in Weather.select(Weather.city_id, Weather.wdate.year, Weather.wdate.month).distinct().tuples()}
+
+    def get_climate(self, city_ids, since_year, until_year, monthly=True):
+        """
+        Сводные показатели погоды городов city_ids за годы с since_year по until_year
+
+        :param list city_ids: Идентификаторы городов
+        :param int since_year: Начальный год
+        :param int until_year: Конечный год
+        :param bool monthly: True - помесячные показатели, False - годовые (month = 0)
+        :return list: Список словарей с полями city_id, year, month, days, max_temp_avg, min_temp_avg,
+                      max_temp_record, min_temp_record, precip_days
+        """
+        city_ids = [int(city_id) for city_id in city_ids]
+        names = set()
+        for city_id in city_ids:
+            names.update(self.router.range_shards(city_id=city_id, since_date=datetime(since_year, 1, 1).date(),
+                                                  until_date=datetime(until_year, 12, 31).date()))
+        rows = []
+        for name in sorted(names):
+            Climate = self._climate(name=name)
+            rows.extend(Climate
+                        .select(Climate.city_id, Climate.year, Climate.month, Climate.days,
+                                peewee.fn.ROUND(Climate.max_temp_sum * 1.0 / Climate.days, 1).alias('max_temp_avg'),
+                                peewee.fn.ROUND(Climate.min_temp_sum * 1.0 / Climate.days, 1).alias('min_temp_avg'),
+                                Climate.max_temp_record, Climate.min_temp_record, Climate.precip_days)
+                        .where(Climate.city_id.in_(city_ids),
+                               Climate.year.between(since_year, until_year),
+                               (Climate.month > 0) if monthly else (Climate.month == 0))
+                        .dicts())
+        return sorted(rows, key=lambda row: (row['city_id'], row['year'], row['month']))
+
+    def row_to_forecast(self, row):
         """
         Преобразует строку таблицы Weather в объект Forecast
 
         :param WeatherTable row: Строка таблицы Weather
         :return: Объект Forecast
         """
-        _fc = weather_maker.Forecast()
-        _fc.city = row.city
-        _fc.city_translit = row.city_translit
-        _fc.set_date(date=row.wdate)
-        _fc.cloudiness = row.cloudiness
-        _fc.precipitations = row.precipitations
-        _fc.day_temp = row.max_temp
-        _fc.day_temp = row.min_temp
+        return self.values_to_forecast(row.city, row.city_translit, row.wdate, row.max_temp, row.min_temp,
+                                       row.cloudiness, row.precipitations)
+
+    def values_to_forecast(self, city, city_translit, wdate, max_temp, min_temp, cloudiness, precipitations):
+        """
+        Создает объект Forecast по значениям полей строки таблицы Weather
+
+        :param int cloudiness: Код облачности
+        :param int precipitations: Код осадков
+        :return: Объект Forecast
+        """
+        _fc = Forecast()
+        _fc.city = city
+        _fc.city_translit = city_translit
+        _fc.set_date(date=wdate)
+        _fc.cloudiness = self.condition_label(cloudiness)
+        _fc.precipitations = self.condition_label(precipitations)
+        _fc.day_temp = max_temp
+        _fc.day_temp = min_temp
         return _fc
 
 
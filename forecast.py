@@ -0,0 +1,110 @@
+from datetime import datetime
+
+
+class Forecast:
+    """ Прогноз подгоды на дату """
+    WEEK_DAYS = ['Вс', 'Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', ]
+
+    def __init__(self):
+        self.city = str()
+        self.city_translit = str()
+        self._cloudiness = str()
+        self._precipitations = str()
+        self._date = None
+        self._temp_list = list()
+
+    def print(self):
+        """
+        Печать в консоль прогноза суточного прогноза погоды
+
+        :return str: Консольное табличное представление прогноза
+        """
+        table_width = 17
+        if table_width < 1:
+            return
+        rows_delimiter = '+{:-^{}}+'.format('', table_width)
+        s = list()
+        s.append(rows_delimiter)
+        s.append('|{:^{}s}|'.format(f'{self.date}, {self.week_day}', table_width))
+        s.append(str('|' + ' {:^7s}|' * 2).format('t\u00B0C От', 't\u00B0C До'))
+        s.append(str('|' + '{:>7s} |' * 2).format(self.day_temp_min, self.day_temp_max))
+        s.append('|{:^{}s}|'.format(self.cloud_precip, table_width))
+        s.append(rows_delimiter)
+        return '\r\n'.join(s)
+
+    @property
+    def week_day(self):
+        if self.date:
+            return self.WEEK_DAYS[int(self._date.strftime('%w'))]
+
+    @property
+    def cloudiness(self):
+        return self._cloudiness
+
+    @cloudiness.setter
+    def cloudiness(self, value):
+        if value is not None:
+            self._cloudiness = str(value).replace('&nbsp;', ' ')
+
+    @property
+    def precipitations(self):
+        return self._precipitations
+
+    @precipitations.setter
+    def precipitations(self, value):
+        if value is not None:
+            self._precipitations = str(value).replace('&nbsp;', ' ')
+
+    @property
+    def day_temp(self) -> str:
+        if not self._temp_list:
+            return ''
+        t = round(sum(self._temp_list) / len(self._temp_list), 1)
+        return f'+{t}' if t > 0 else str(t)
+
+    @day_temp.setter
+    def day_temp(self, temp):
+        if temp != '':
+            self._temp_list.append(int(str(temp).replace(chr(8722), chr(45))))
+
+    @property
+    def day_temp_max(self) -> str:
+        if not self._temp_list:
+            return ''
+        _t = max(self._temp_list)
+        return f'+{_t}' if _t > 0 else str(_t)
+
+    @property
+    def day_temp_min(self) -> str:
+        if not self._temp_list:
+            return ''
+        _t = min(self._temp_list)
+        return f'+{_t}' if _t > 0 else str(_t)
+
+    @property
+    def date(self) -> datetime.date:
+        try:
+            return self._date.strftime('%d.%m.%Y')
+        except AttributeError:
+            return None
+
+    @property
+    def day(self) -> datetime.date:
+        """ Дата прогноза в виде объекта date """
+        return self._date
+
+    @property
+    def cloud_precip(self):
+        _s = self.cloudiness
+        if self.precipitations:
+            _s += f', {self.precipitations}'
+        return _s
+
+    def set_date(self, date: datetime.date):
+        self._date = date
+
+    def to_dict(self):
+        return {'max_temp': self.day_temp_max or None,
+                'min_temp': self.day_temp_min or None,
+                'cloudiness': self.cloudiness.lower() or None,
+                'precipitations': self.precipitations.lower() or None}
@@ -0,0 +1,123 @@
+# Проверка расхода памяти при загрузке истории погоды.
+# Для каждого сценария запускается отдельный процесс, который читает дневник с подменной сессией
+# (без обращения к сайту) и печатает пик памяти, выделенной во время чтения (tracemalloc).
+# Так как WeatherMaker.iter_forecasts отдает прогнозы помесячно и не накапливает их, пик длинного периода
+# не должен превышать пик короткого больше чем на PEAK_GROWTH_LIMIT. Контрольный сценарий хранит
+# все прогнозы периода и обязан превысить предел - иначе проверка ничего не ловит.
+# Дерево разбора страницы содержит циклические ссылки, поэтому на границе месяцев вызывается gc.collect():
+# без этого пик определяется моментом сборки мусора, а не тем, что действительно удерживается в памяти.
+
+import gc
+import subprocess
+import sys
+import tracemalloc
+from datetime import date
+
+SCENARIOS = {
+    # имя: (начало периода, конец периода, хранить ли все прогнозы)
+    '1 year':          (date(2015, 1, 1), date(2015, 12, 31), False),
+    '20 years':        (date(2000, 1, 1), date(2019, 12, 31), False),
+    '20 years, kept':  (date(2000, 1, 1), date(2019, 12, 31), True),
+}
+BASELINE = '1 year'
+CONTROL = '20 years, kept'
+PEAK_GROWTH_LIMIT = 256 * 1024  # Допустимый рост пика памяти относительно короткого периода, байт
+PAGE_PADDING = 256 * 1024  # Размер разметки страницы дневника до таблицы, байт
+
+DIARY_ROW = ('<tr><td>{day}</td><td>+{max_temp}</td><td>760</td>'
+             '<td><img src="//st.gismeteo.ru/img/sun.png"></td><td></td><td>+{min_temp}</td>'
+             '<td>+{min_temp}</td><td>760</td></tr>')
+
+
+class FakeResponse:
+    """ Ответ с синтетической страницей дневника на 31 день """
+
+    encoding = 'utf-8'
+    status_code = 200
+    text = ''
+
+    def __init__(self):
+        rows = ''.join(DIARY_ROW.format(day=day, max_temp=day % 10 + 5, min_temp=day % 10) for day in range(1, 32))
+        self.page = f'<html><div>{"x" * PAGE_PADDING}</div><table><tbody>{rows}</tbody></table></html>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for begin in range(0, len(self.page), chunk_size):
+            yield self.page[begin:begin + chunk_size]
+
+
+class FakeSession:
+    """ Подмена requests.Session: на любой запрос возвращает страницу дневника """
+
+    def get(self, url, timeout=None, stream=False):
+        return FakeResponse()
+
+    def close(self):
+        pass
+
+
+def peak_memory(since_date, until_date, keep):
+    """
+    Читает прогнозы за период и возвращает пик памяти, выделенной во время чтения
+
+    :param datetime.date since_date: Начало периода
+    :param datetime.date until_date: Конец периода
+    :param bool keep: Хранить все прогнозы периода, как get_forecast, вместо потокового чтения
+    :return tuple: (количество прогнозов, пик памяти в байтах)
+    """
+    from weather_maker import HttpTransport, WeatherMaker
+
+    HttpTransport._session = FakeSession()
+    WeatherMaker._cities_catalog = [{'name': 'Москва', 'link': WeatherMaker.DEFAULT_FORECAST_PAGE}]
+    WeatherMaker._diary_labels.update({'sun.png': 'Ясно'})
+    WeatherMaker.HUMAN_IMITATE_TIMEOUT = 0
+    maker = WeatherMaker()
+    tracemalloc.start()
+    kept = []
+    count = 0
+    for forecast in maker.iter_forecasts(needle_city='Москва', since_date=since_date, until_date=until_date):
+        count += 1
+        if keep:
+            kept.append(forecast)
+        if forecast.day.day == 1:
+            gc.collect()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, peak
+
+
+def measure(since_date, until_date, keep):
+    """ Запускает peak_memory в новом процессе интерпретатора """
+    code = (f'import memory_check, datetime; '
+            f'print(*memory_check.peak_memory(datetime.date.fromisoformat("{since_date}"), '
+            f'datetime.date.fromisoformat("{until_date}"), {keep}))')
+    result = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, text=True, check=True)
+    count, peak = result.stdout.split()
+    return int(count), int(peak)
+
+
+if __name__ == '__main__':
+    results = {}
+    for name, (since_date, until_date, keep) in SCENARIOS.items():
+        count, peak = measure(since_date, until_date, keep)
+        results[name] = peak
+        print(f'{name}: {count} дн., пик памяти {peak / 1024:.0f} КБ')
+    failed = False
+    for name, peak in results.items():
+        if name == BASELINE:
+            continue
+        growth = peak - results[BASELINE]
+        exceeded = growth > PEAK_GROWTH_LIMIT
+        expected = name == CONTROL
+        failed = failed or exceeded != expected
+        print(f'{name}: рост {growth / 1024:+.0f} КБ (допустимо {PEAK_GROWTH_LIMIT // 1024} КБ) - '
+              f'{"превышен" if exceeded else "в пределах"}{", как ожидалось" if exceeded == expected else "!"}')
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,64 @@
+# Проверка параллельной отрисовки открыток.
+# Открытки и лист открыток за период рисуются в текущем процессе и пулом PostcardRenderPool,
+# результаты должны совпадать попиксельно.
+# Запуск: python render_check.py [путь к файлу шрифта]
+
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+from forecast import Forecast
+from weather_postcard import PostcardRenderPool, PostcardSheet, WeatherPostcard
+
+SINCE_DATE = date(2020, 3, 4)
+DAYS = 12
+WORKERS = 2
+CONDITIONS = [('Ясно', ''), ('Облачно', 'Дождь'), ('Пасмурно', 'Снег'), ('Переменная облачность', 'Гроза')]
+
+
+def make_forecasts():
+    """ Прогнозы с разными состояниями погоды и температурами """
+    forecasts = dict()
+    for day in range(DAYS):
+        forecast = Forecast()
+        forecast.city, forecast.city_translit = 'Москва', 'moscow'
+        forecast.set_date(SINCE_DATE + timedelta(day))
+        forecast.cloudiness, forecast.precipitations = CONDITIONS[day % len(CONDITIONS)]
+        forecast.day_temp = day - 5
+        forecast.day_temp = day - 12
+        forecasts[forecast.day] = forecast
+    return forecasts
+
+
+def check(font=None):
+    """
+    Сравнивает отрисовку пулом с отрисовкой в текущем процессе
+
+    :param str font: Путь к файлу шрифта
+    :return list: Список описаний расхождений
+    """
+    forecasts = make_forecasts()
+    errors = []
+    serial = {forecast.day: WeatherPostcard.from_forecast(forecast, font=font).image for forecast in forecasts.values()}
+    serial_sheet = PostcardSheet(forecasts, font=font)
+    serial_sheet.render()
+    with PostcardRenderPool(workers=WORKERS, font=font, slots=3) as pool:
+        for forecast, image in pool.render(forecasts):
+            if not np.array_equal(image, serial[forecast.day]):
+                errors.append(f'открытка {forecast.date}: отличается от отрисованной в текущем процессе')
+        pool_sheet = PostcardSheet(forecasts, font=font)
+        pool_sheet.render(pool=pool)
+    if not np.array_equal(pool_sheet.image, serial_sheet.image):
+        errors.append('лист открыток: отличается от отрисованного в текущем процессе')
+    if pool_sheet.index != serial_sheet.index:
+        errors.append('лист открыток: отличается индекс')
+    return errors
+
+
+if __name__ == '__main__':
+    errors = check(font=sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f'{DAYS} открыток, {WORKERS} процесса: {"ошибки" if errors else "ok"}')
+    for error in errors:
+        print(f'  {error}')
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,48 @@
+# Замер времени запуска консольного приложения.
+# Для каждого сценария запускается отдельный процесс python -X importtime,
+# печатаются общее время и самые тяжелые импорты (кумулятивное время, мкс).
+
+import subprocess
+import sys
+import time
+
+SCENARIOS = {
+    'import':       'import weather_console',
+    'show_needles': 'import weather_console; print(weather_console.WeatherConsole())',
+    'help':         'import weather_console; weather_console.WeatherConsole().help()',
+}
+TOP_IMPORTS = 10
+REPEATS = 5
+
+
+def measure(code):
+    """
+    Запускает code в новом процессе интерпретатора
+
+    :param str code: Исходный код сценария
+    :return tuple: (лучшее время запуска в секундах, [(кумулятивное время импорта в мкс, модуль), ...])
+    """
+    best = None
+    imports = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+            imports = []
+            for line in result.stderr.splitlines():
+                if not line.startswith('import time:') or 'cumulative' in line:
+                    continue
+                _, cumulative, module = line[len('import time:'):].split('|')
+                imports.append((int(cumulative), module.strip()))
+    return best, imports
+
+
+if __name__ == '__main__':
+    for name, code in SCENARIOS.items():
+        elapsed, imports = measure(code)
+        print(f'{name}: {elapsed * 1000:.1f} мс')
+        for cumulative, module in sorted(imports, reverse=True)[:TOP_IMPORTS]:
+            print(f'  {cumulative:>10} мкс  {module}')
@@ -0,0 +1,57 @@
+# Проверка хранилища погоды.
+# Для каждой схемы хранения создается новая БД во временном каталоге,
+# в нее записываются дни двух лет, затем записи читаются обратно.
+# Второй экземпляр WeatherDatabase с другим каталогом не должен влиять на первый.
+
+import sys
+import tempfile
+from datetime import date
+
+from database_updater import WeatherDatabase, PARTITION_NONE, PARTITION_YEAR, PARTITION_CITY
+
+LAYOUTS = {
+    'single': PARTITION_NONE,
+    'year':   PARTITION_YEAR,
+    'city':   PARTITION_CITY,
+}
+CITY_ID = 4368
+DAYS = [date(2019, 12, 31), date(2020, 1, 1)]
+
+
+def row(wdate, max_temp):
+    return dict(city_id=CITY_ID, city='Москва', city_translit='moscow', wdate=wdate, max_temp=max_temp,
+                min_temp=max_temp - 5, cloudiness='Ясно', precipitations=None)
+
+
+def check(partition):
+    """
+    Проверяет запись и чтение в новой БД со схемой хранения partition
+
+    :return list: Список описаний ошибок
+    """
+    errors = []
+    with tempfile.TemporaryDirectory() as first_path, tempfile.TemporaryDirectory() as second_path:
+        first = WeatherDatabase(db_path=first_path, partition=partition)
+        second = WeatherDatabase(db_path=second_path, partition=partition)
+        first.weather_upsert_rows([row(wdate, max_temp=1) for wdate in DAYS])
+        second.weather_upsert_rows([row(wdate, max_temp=2) for wdate in DAYS])
+        for name, db, max_temp in (('first', first, 1), ('second', second, 2)):
+            rows = db.get_period_weather(city_id=CITY_ID, since_date=DAYS[0], until_date=DAYS[-1])
+            if [(r.wdate, r.max_temp) for r in rows] != [(wdate, max_temp) for wdate in DAYS]:
+                errors.append(f'{name}: прочитано {[(r.wdate, r.max_temp) for r in rows]}')
+            if db.find_city('Москва') != (CITY_ID, 'Москва'):
+                errors.append(f'{name}: город не найден')
+        first.router.close()
+        second.router.close()
+    return errors
+
+
+if __name__ == '__main__':
+    failed = False
+    for name, partition in LAYOUTS.items():
+        errors = check(partition)
+        failed = failed or bool(errors)
+        print(f'{name}: {"ошибки" if errors else "ok"}')
+        for error in errors:
+            print(f'  {error}')
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,182 @@
+import argparse
+import multiprocessing
+import signal
+import time
+from datetime import datetime, timedelta
+
+from database_updater import WeatherDatabase
+from weather_maker import WeatherMaker
+
+DATE_FORMAT = '%d.%m.%Y'
+
+# Состояние процесса-исполнителя, устанавливается в init_worker
+_worker_maker = None
+_worker_limiter = None
+
+
+class RateLimiter:
+    """
+    Общее для всех процессов ограничение частоты запросов к сайту:
+    каждый запрос занимает ближайший свободный интервал длиной 1 / rate секунд.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self._lock = multiprocessing.Lock()
+        self._next = multiprocessing.Value('d', 0.0, lock=False)
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.value)
+            self._next.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def init_worker(limiter):
+    """
+    Инициализация процесса-исполнителя: прерывание обрабатывает только координатор,
+    каталог городов загружается из файла, сохраненного координатором
+
+    :param RateLimiter limiter: Общий ограничитель частоты запросов
+    """
+    global _worker_maker, _worker_limiter
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_limiter = limiter
+    _worker_maker = WeatherMaker()
+    _worker_maker.HUMAN_IMITATE_TIMEOUT = 0  # паузы между запросами задает RateLimiter
+
+
+def fetch_unit(unit):
+    """
+    Загружает один месяц истории города
+
+    :param tuple unit: (city_id, city, year, month, since_date, until_date)
+    :return tuple: (unit, список словарей с полями таблицы погоды, текст ошибки или None)
+    """
+    city_id, city, year, month, since_date, until_date = unit
+    _worker_limiter.wait()
+    try:
+        rows = [dict(city_id=city_id, city=_worker_maker.city, city_translit=forecast.city_translit,
+                     wdate=forecast.day, **forecast.to_dict())
+                for forecast in _worker_maker.iter_forecasts(needle_city=city, since_date=since_date,
+                                                             until_date=until_date)]
+    except Exception as exc:
+        return unit, None, f'{exc.__class__.__name__}: {exc}'
+    return unit, rows, None
+
+
+class WeatherBackfill:
+    """
+    Загрузка истории погоды (дневников) за годы для многих городов.
+    Работа делится на единицы (город, месяц), которые выполняются пулом процессов;
+    результаты каждой единицы сохраняются вместе с контрольной точкой,
+    поэтому повторный запуск продолжает загрузку с места остановки.
+    """
+
+    def __init__(self, cities, since_date, until_date, workers=4, rate=0.5, db=None):
+        """
+        :param list cities: Названия городов
+        :param datetime.date since_date: Начало периода
+        :param datetime.date until_date: Конец периода (не позднее вчерашнего дня)
+        :param int workers: Количество процессов
+        :param float rate: Общий лимит запросов к сайту в секунду
+        :param WeatherDatabase db: БД для сохранения, по умолчанию WeatherDatabase()
+        """
+        yesterday = (datetime.today() - timedelta(1)).date()
+        self.since_date = since_date
+        self.until_date = min(until_date, yesterday)
+        self.workers = workers
+        self.rate = rate
+        self.db = db or WeatherDatabase()
+        self.cities = self._resolve_cities(cities)
+
+    @staticmethod
+    def _resolve_cities(cities):
+        """
+        Определяет идентификаторы городов; заодно сохраняет каталог для процессов-исполнителей.
+        Город, которого нет в каталоге, - ошибка: подстановка города по умолчанию загрузила бы чужую историю
+        """
+        maker = WeatherMaker()
+        resolved = []
+        for city in cities:
+            city_url, name = maker.find_city(needle_city=city)
+            if name.upper() != city.strip().upper():
+                raise ValueError(f'Город не найден в каталоге: {city}')
+            resolved.append((int(maker.url_city_id(city_url)), name))
+        return resolved
+
+    @staticmethod
+    def full_month(since_date, until_date):
+        """ Единица загрузки покрывает весь календарный месяц: только такие месяцы отмечаются завершенными """
+        return since_date.day == 1 and (until_date + timedelta(1)).day == 1
+
+    def units(self):
+        """
+        Незавершенные единицы загрузки. Неполные первый и последний месяцы периода не отмечаются
+        завершенными и загружаются при каждом запуске
+
+        :return list: Список кортежей (city_id, city, year, month, since_date, until_date)
+        """
+        done = self.db.backfill_done([city_id for city_id, _ in self.cities])
+        units = []
+        for city_id, city in self.cities:
+            month_since = self.since_date
+            while month_since <= self.until_date:
+                next_month = datetime(year=month_since.year + month_since.month // 12,
+                                      month=month_since.month % 12 + 1, day=1).date()
+                month_until = min(next_month - timedelta(1), self.until_date)
+                if (city_id, month_since.year, month_since.month) not in done:
+                    units.append((city_id, city, month_since.year, month_since.month, month_since, month_until))
+                month_since = next_month
+        return units
+
+    def run(self):
+        """ Выполняет незавершенные единицы загрузки. Прерывание (Ctrl+C) не теряет сохраненные месяцы """
+        units = self.units()
+        print(f'К загрузке: {len(units)} мес.')
+        if not units:
+            return
+        limiter = RateLimiter(rate=self.rate)
+        pool = multiprocessing.Pool(processes=self.workers, initializer=init_worker, initargs=(limiter,))
+        try:
+            for i, (unit, rows, error) in enumerate(pool.imap_unordered(fetch_unit, units), start=1):
+                city_id, city, year, month, since_date, until_date = unit
+                if error is not None:
+                    print(f'  [{i}/{len(units)}] {city} {month:02d}.{year}: ошибка {error}, месяц будет повторен')
+                    continue
+                if not rows:
+                    # Пустой ответ (капча, измененная разметка, неизвестные значки) не отмечается завершенным
+                    print(f'  [{i}/{len(units)}] {city} {month:02d}.{year}: нет данных, месяц будет повторен')
+                    continue
+                self.db.backfill_commit(city_id=city_id, year=year, month=month, rows=rows,
+                                        done=self.full_month(since_date, until_date))
+                print(f'  [{i}/{len(units)}] {city} {month:02d}.{year}: {len(rows)} дн.')
+            pool.close()
+        except KeyboardInterrupt:
+            print('Загрузка прервана, завершенные месяцы сохранены')
+            pool.terminate()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-cities', type=str, required=True, help='Города через запятую')
+    parser.add_argument('-sdate', type=str, required=True, help='Начало периода в формате dd.mm.yyyy')
+    parser.add_argument('-udate', type=str, required=True, help='Конец периода в формате dd.mm.yyyy')
+    parser.add_argument('-workers', type=int, default=4, help='Количество процессов')
+    parser.add_argument('-rate', type=float, default=0.5, help='Общий лимит запросов к сайту в секунду')
+    args = parser.parse_args()
+    try:
+        backfill = WeatherBackfill(cities=[city.strip() for city in args.cities.split(',')],
+                                   since_date=datetime.strptime(args.sdate, DATE_FORMAT).date(),
+                                   until_date=datetime.strptime(args.udate, DATE_FORMAT).date(),
+                                   workers=args.workers, rate=args.rate)
+    except ValueError as exc:
+        parser.error(str(exc))
+    backfill.run()
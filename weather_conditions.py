@@ -0,0 +1,62 @@
+# Справочник состояний погоды (облачность и осадки).
+# Код хранится в БД вместо текста, по коду открытка выбирает значок и цвет фона.
+
+CONDITION_CLEAR = 1
+CONDITION_FEW_CLOUDS = 2
+CONDITION_PARTLY_CLOUDY = 3
+CONDITION_CLOUDY = 4
+CONDITION_OVERCAST = 5
+CONDITION_LIGHT_RAIN = 6
+CONDITION_RAIN = 7
+CONDITION_HEAVY_RAIN = 8
+CONDITION_PRECIPITATION = 9
+CONDITION_LIGHT = 10
+CONDITION_THUNDERSTORM = 11
+CONDITION_LIGHT_SNOW = 12
+CONDITION_SNOW = 13
+CONDITION_HEAVY_SNOW = 14
+CONDITION_SNOW_RAIN = 15
+CONDITION_SLEET = 16
+
+# Коды до 100 зарезервированы за известными состояниями, новые подписи с сайта получают коды начиная с 101
+CUSTOM_CODES_START = 101
+
+LABELS = {
+    CONDITION_CLEAR: 'ясно',
+    CONDITION_FEW_CLOUDS: 'малооблачно',
+    CONDITION_PARTLY_CLOUDY: 'переменная облачность',
+    CONDITION_CLOUDY: 'облачно',
+    CONDITION_OVERCAST: 'пасмурно',
+    CONDITION_LIGHT_RAIN: 'небольшой дождь',
+    CONDITION_RAIN: 'дождь',
+    CONDITION_HEAVY_RAIN: 'сильный дождь',
+    CONDITION_PRECIPITATION: 'осадки',
+    CONDITION_LIGHT: 'небольшой',
+    CONDITION_THUNDERSTORM: 'гроза',
+    CONDITION_LIGHT_SNOW: 'небольшой снег',
+    CONDITION_SNOW: 'снег',
+    CONDITION_HEAVY_SNOW: 'сильный снег',
+    CONDITION_SNOW_RAIN: 'снег с дождём',
+    CONDITION_SLEET: 'мокрый снег',
+}
+CODES = {label: code for code, label in LABELS.items()}
+
+
+def normalize(label):
+    """
+    Приводит подпись состояния погоды к виду, в котором она хранится в справочнике
+
+    :param str label: Подпись облачности или осадков
+    :rtype: str
+    """
+    return str(label).replace('&nbsp;', ' ').strip().lower()
+
+
+def code_of(label):
+    """
+    Код известного состояния погоды или None
+
+    :param str label: Подпись облачности или осадков
+    :rtype: int
+    """
+    return CODES.get(normalize(label))
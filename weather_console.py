@@ -3,9 +3,8 @@ import pathlib
 import re
 from datetime import datetime
 
-from weather_maker import WeatherMaker
-from database_updater import WeatherDatabase, NotNullValueError, DuplicateKeyError
-import weather_postcard
+# weather_maker (requests, bs4), database_updater (peewee) и weather_postcard (OpenCV, PIL, NumPy)
+# импортируются при первой команде, которой они нужны
 
 WORK_DIR = pathlib.Path().absolute()
 
@@ -16,35 +15,80 @@ class WeatherConsole:
                          flags=re.IGNORECASE)
     RE_DB = re.compile(pattern=r'(db_save|db_src|db_update)=(true|false)', flags=re.IGNORECASE)
     RE_CITY = re.compile(pattern=r'city=(".*"|[\w\-]*)', flags=re.IGNORECASE)
+    RE_WORKERS = re.compile(pattern=r'workers=(\d+)', flags=re.IGNORECASE)
     DATE_FORMAT = '%d.%m.%Y'
 
     def __init__(self):
         self.db_save = True
         self.db_update = True
         self.db_src = False
+        self.workers = 0  # Количество процессов отрисовки открыток; 0 или 1 - в текущем процессе
         self._sdate = None
         self._udate = None
         self.parser = None
-        self.weather = WeatherMaker()
-        self.db = WeatherDatabase()
+        self.forecasts = dict()  # {<class 'datetime.date'>: <class 'Forecast'>, ...}
+        self._city_needle = None
+        self._db_city = None  # (city_id, city) из БД для работы без обращения к сайту
+        self._weather = None
+        self._db = None
+
+    @property
+    def weather(self):
+        """ Парсер сайта, создается при первом обращении (загрузка каталога городов) """
+        if self._weather is None:
+            from weather_maker import WeatherMaker
+            self._weather = WeatherMaker()
+            if self._city_needle is not None:
+                self._weather.init_city_url(needle_city=self._city_needle)
+        return self._weather
+
+    @property
+    def db(self):
+        """ Работа с БД, создается при первом обращении """
+        if self._db is None:
+            from database_updater import WeatherDatabase
+            self._db = WeatherDatabase()
+        return self._db
 
     def __str__(self):
         _s = 'Параметры работы:\n'
-        for attr in ['city', 'sdate', 'udate', 'db_save', 'db_src', 'db_update']:
+        for attr in ['city', 'sdate', 'udate', 'db_save', 'db_src', 'db_update', 'workers']:
             _s += f'  {attr} = {getattr(self, attr)}\n'
         return _s
 
+    def _resolve_db_city(self):
+        """ Для источника БД город определяется по сохраненным записям без загрузки каталога с сайта """
+        if self._weather is None and self.db_src and self._city_needle:
+            if self._db_city is None:
+                self._db_city = self.db.find_city(self._city_needle)
+            return self._db_city
+
     @property
     def city_id(self):
+        db_city = self._resolve_db_city()
+        if db_city:
+            return db_city[0]
+        if self._weather is None and not self._city_needle:
+            return ''
         return self.weather.city_id or ''
 
     @property
     def city(self):
+        db_city = self._resolve_db_city()
+        if db_city:
+            return db_city[1]
+        if self._weather is None:
+            return self._city_needle or ''
         return self.weather.city or ''
 
     @city.setter
     def city(self, city):
-        self.weather.init_city_url(needle_city=city)
+        if city is None:
+            return
+        self._city_needle = city
+        self._db_city = None
+        if self._weather is not None:
+            self._weather.init_city_url(needle_city=city)
 
     @property
     def sdate(self):
@@ -72,15 +116,14 @@ class WeatherConsole:
 
     def collect_forecasts(self):
         if self.db_src:
-            for row in self.db.get_period_weather(city_id=self.city_id, since_date=self.sdate, until_date=self.udate):
-                _f = {row.wdate: self.db.row_to_forecast(row=row), }
-                self.weather.daily_forecasts.update(_f)
+            self.forecasts = self.db.get_period_forecasts(city_id=self.city_id, since_date=self.sdate,
+                                                          until_date=self.udate)
         else:
-            self.weather.get_forecast(needle_city=self.weather.city,
-                                      since_date=self.sdate, until_date=self.udate)
+            self.forecasts = dict(self.weather.get_forecast(needle_city=self.weather.city,
+                                                            since_date=self.sdate, until_date=self.udate))
 
-    def parse(self):
-        """ Парсинг параметров запуска """
+    def build_parser(self):
+        """ Создание парсера параметров запуска """
         self.parser = argparse.ArgumentParser()
         self.parser.add_argument('-city', type=str, help='Город')
         self.parser.add_argument('-sdate', type=str, help='Начало периода прогноза в формате dd.mm.yyyy')
@@ -91,6 +134,12 @@ class WeatherConsole:
                                  help='Пометка о необходимости сохранения данных в БД')
         self.parser.add_argument('-db_update', type=bool, default=True,
                                  help='Пометка о необходимости обновления данных в БД')
+        self.parser.add_argument('-workers', type=int, default=0,
+                                 help='Количество процессов отрисовки открыток')
+
+    def parse(self):
+        """ Парсинг параметров запуска """
+        self.build_parser()
         self.parser.parse_args(namespace=self)
         if self.sdate is None:
             self.cons_parse()
@@ -114,6 +163,10 @@ class WeatherConsole:
             result = True
             for attrs in match:
                 setattr(self, attrs[0].lower(), True if attrs[1] == 'true' else False)
+        match = re.findall(pattern=self.RE_WORKERS, string=command_line)
+        if match:
+            result = True
+            self.workers = int(match[0])
         match = re.findall(pattern=self.RE_CITY, string=command_line)
         if match:
             result = True
@@ -128,7 +181,9 @@ class WeatherConsole:
 
     def save_forecasts(self):
         """ Сохранение прогнозов в БД """
-        for date, forecast in self.weather.daily_forecasts.items():
+        from database_updater import NotNullValueError, DuplicateKeyError
+
+        for date, forecast in self.forecasts.items():
             try:
                 self.db.weather_insert_row(wdate=date,
                                            city_translit=forecast.city_translit, city_id=self.city_id, city=self.city,
@@ -142,40 +197,57 @@ class WeatherConsole:
     def show_forecast(self):
         """ Печать прогнозов в консоль """
         self.collect_forecasts()
-        if self.weather.daily_forecasts:
+        if self.forecasts:
             print(f'{self.city}: прогноз погоды')
-            for date, forecast in self.weather.daily_forecasts.items():
+            for date, forecast in self.forecasts.items():
                 print(forecast.print())
         else:
             print(f'Данные по прогнозу погоды в городе {self.city} за запрашиваемый период отсутствуют')
 
-    def make_postcards(self):
-        """ Печать открытки с прогнозом погоды """
+    def make_postcards(self, sheet=False):
+        """
+        Печать открытки с прогнозом погоды
+
+        :param bool sheet: Все открытки периода на одном листе с JSON-индексом вместо файла на каждый день
+        """
+        import weather_postcard
 
         self.collect_forecasts()
-        if self.weather.daily_forecasts:
+        if self.forecasts:
             cards_path = WORK_DIR / 'postcards'
             if not pathlib.Path.is_dir(cards_path):
                 pathlib.Path.mkdir(cards_path)
-            for date, forecast in self.weather.daily_forecasts.items():
-                _date = datetime.strptime(forecast.date, '%d.%m.%Y').strftime('%Y-%m-%d')
-                postcard = weather_postcard.WeatherPostcard()
-                postcard.init_postcard(precipitations=forecast.precipitations or forecast.cloudiness)
-                postcard.append_date(f'{forecast.date}, {forecast.week_day}')
-                postcard.append_max_temp(forecast.day_temp_max)
-                postcard.append_min_temp(forecast.day_temp_min)
-                postcard.append_precipitations(forecast.cloud_precip)
-                postcard.save_file(path=cards_path / f'{forecast.city_translit.capitalize()}_{_date}.png')
+            pool = weather_postcard.PostcardRenderPool(workers=self.workers) if self.workers > 1 else None
+            try:
+                if sheet:
+                    dates = sorted(self.forecasts)
+                    forecast = self.forecasts[dates[0]]
+                    name = f'{forecast.city_translit.capitalize()}_{dates[0]:%Y-%m-%d}_{dates[-1]:%Y-%m-%d}'
+                    postcard_sheet = weather_postcard.PostcardSheet(self.forecasts)
+                    postcard_sheet.render(pool=pool)
+                    postcard_sheet.save_file(path=cards_path / f'{name}.png', index_path=cards_path / f'{name}.json')
+                elif pool is not None:
+                    pool.save_files(self.forecasts, path=cards_path)
+                else:
+                    for date, forecast in self.forecasts.items():
+                        postcard = weather_postcard.WeatherPostcard.from_forecast(forecast)
+                        postcard.save_file(path=cards_path / postcard.file_name(forecast))
+            finally:
+                if pool is not None:
+                    pool.close()
         else:
             print(f'Данные по прогнозу погоды в городе {self.city} за запрашиваемый период отсутствуют')
 
     def help(self):
+        if self.parser is None:
+            self.build_parser()
         self.parser.print_help()
         print('additional interactive mode arguments:')
         print('  show_needles      Показать текущие настройки')
         print('  show_cities       Показать города для получения прогноза')
         print('  forecast          Получить прогноз в соответствии с текущими настройками в текстовом виде')
         print('  postcards         Получить прогноз в соответствии с текущими настройками в виде открыток')
+        print('  sheet             Получить прогноз в виде одного листа открыток с JSON-индексом')
         print('  exit              Завершение работы')
         print('В интерактивном режиме также возможно использование основных аргументов.')
         print()
@@ -201,6 +273,10 @@ class WeatherConsole:
                 self.make_postcards()
                 if self.db_save and not self.db_src:
                     self.save_forecasts()
+            elif command == 'sheet':
+                self.make_postcards(sheet=True)
+                if self.db_save and not self.db_src:
+                    self.save_forecasts()
             else:
                 if not self.set_needles(command_line=command):
                     self.help()
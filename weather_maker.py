@@ -1,113 +1,88 @@
+import json
+import os
+import pathlib
 import re
+import time
 from datetime import datetime, timedelta
 from time import sleep
 
 import requests
+import soupsieve
 from bs4 import BeautifulSoup
-
-
-class Forecast:
-    """ Прогноз подгоды на дату """
-    WEEK_DAYS = ['Вс', 'Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', ]
-
-    def __init__(self):
-        self.city = str()
-        self.city_translit = str()
-        self._cloudiness = str()
-        self._precipitations = str()
-        self._date = None
-        self._temp_list = list()
-
-    def print(self):
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+from forecast import Forecast
+
+
+class HttpTransport:
+    """
+    Настройки HTTP-транспорта, общие для всех экземпляров WeatherMaker в процессе.
+    Сессия создается один раз при первом обращении и переиспользуются,
+    поэтому пул keep-alive соединений разделяется между всеми парсерами.
+    """
+    POOL_SIZE = 10
+    CONNECT_TIMEOUT = 5
+    READ_TIMEOUT = 30
+    RETRIES = 3
+    BACKOFF_FACTOR = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    HEADERS = {'user-agent': 'Mozilla/5.0 (Windows NT 10.0) AppleWebKit/537.36 (KHTML, like Gecko) '
+                             'Chrome/79.0.3945.117 YaBrowser/20.2.0.1043 Yowser/2.5 Safari/537.36',
+               'accept-language': 'ru,en;q=0.9',
+               # gzip/deflate всегда, br/zstd - только если установлены соответствующие декодеры
+               'accept-encoding': make_headers(accept_encoding=True)['accept-encoding'],
+               'connection': 'keep-alive',
+               }
+
+    _session = None
+
+    @classmethod
+    def configure(cls, **settings):
         """
-        Печать в консоль прогноза суточного прогноза погоды
+        Изменяет настройки транспорта. Уже созданная сессия закрывается и будет пересоздана
+        с новыми параметрами при следующем обращении.
 
-        :return str: Консольное табличное представление прогноза
+        :param settings: Новые значения атрибутов класса, например pool_size=32, read_timeout=10
         """
-        table_width = 17
-        if table_width < 1:
-            return
-        rows_delimiter = '+{:-^{}}+'.format('', table_width)
-        s = list()
-        s.append(rows_delimiter)
-        s.append('|{:^{}s}|'.format(f'{self.date}, {self.week_day}', table_width))
-        s.append(str('|' + ' {:^7s}|' * 2).format('t\u00B0C От', 't\u00B0C До'))
-        s.append(str('|' + '{:>7s} |' * 2).format(self.day_temp_min, self.day_temp_max))
-        s.append('|{:^{}s}|'.format(self.cloud_precip, table_width))
-        s.append(rows_delimiter)
-        return '\r\n'.join(s)
-
-    @property
-    def week_day(self):
-        if self.date:
-            return self.WEEK_DAYS[int(self._date.strftime('%w'))]
-
-    @property
-    def cloudiness(self):
-        return self._cloudiness
-
-    @cloudiness.setter
-    def cloudiness(self, value):
-        if value is not None:
-            self._cloudiness = str(value).replace('&nbsp;', ' ')
-
-    @property
-    def precipitations(self):
-        return self._precipitations
-
-    @precipitations.setter
-    def precipitations(self, value):
-        if value is not None:
-            self._precipitations = str(value).replace('&nbsp;', ' ')
-
-    @property
-    def day_temp(self) -> str:
-        if not self._temp_list:
-            return ''
-        t = round(sum(self._temp_list) / len(self._temp_list), 1)
-        return f'+{t}' if t > 0 else str(t)
-
-    @day_temp.setter
-    def day_temp(self, temp):
-        if temp != '':
-            self._temp_list.append(int(str(temp).replace(chr(8722), chr(45))))
-
-    @property
-    def day_temp_max(self) -> str:
-        if not self._temp_list:
-            return ''
-        _t = max(self._temp_list)
-        return f'+{_t}' if _t > 0 else str(_t)
-
-    @property
-    def day_temp_min(self) -> str:
-        if not self._temp_list:
-            return ''
-        _t = min(self._temp_list)
-        return f'+{_t}' if _t > 0 else str(_t)
-
-    @property
-    def date(self) -> datetime.date:
-        try:
-            return self._date.strftime('%d.%m.%Y')
-        except AttributeError:
-            return None
-
-    @property
-    def cloud_precip(self):
-        _s = self.cloudiness
-        if self.precipitations:
-            _s += f', {self.precipitations}'
-        return _s
-
-    def set_date(self, date: datetime.date):
-        self._date = date
+        for name, value in settings.items():
+            attr = name.upper()
+            if not hasattr(cls, attr):
+                raise AttributeError(f'Неизвестная настройка транспорта: {name}')
+            setattr(cls, attr, value)
+        cls.close()
+
+    @classmethod
+    def timeout(cls) -> tuple:
+        """ Таймауты (connect, read) в секундах """
+        return cls.CONNECT_TIMEOUT, cls.READ_TIMEOUT
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        """
+        Общая для процесса сессия requests с пулом соединений размера POOL_SIZE
+        и повторами запросов с экспоненциальной задержкой
 
-    def to_dict(self):
-        return {'max_temp': self.day_temp_max or None,
-                'min_temp': self.day_temp_min or None,
-                'cloudiness': self.cloudiness.lower() or None,
-                'precipitations': self.precipitations.lower() or None}
+        :rtype: requests.Session
+        """
+        if cls._session is None:
+            retry = Retry(total=cls.RETRIES, connect=cls.RETRIES, read=cls.RETRIES,
+                          backoff_factor=cls.BACKOFF_FACTOR, status_forcelist=cls.RETRY_STATUSES)
+            adapter = HTTPAdapter(pool_connections=cls.POOL_SIZE, pool_maxsize=cls.POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.headers.update(cls.HEADERS)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            cls._session = session
+        return cls._session
+
+    @classmethod
+    def close(cls):
+        """ Закрывает сессию """
+        if cls._session is not None:
+            cls._session.close()
+            cls._session = None
 
 
 class WeatherMaker:
@@ -122,25 +97,51 @@ class WeatherMaker:
     PERIOD_MONTH = 'month/'
     HUMAN_IMITATE_TIMEOUT = 3
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers = {'user-agent': 'Mozilla/5.0 (Windows NT 10.0) AppleWebKit/537.36 (KHTML, like Gecko) '
-                                              'Chrome/79.0.3945.117 YaBrowser/20.2.0.1043 Yowser/2.5 Safari/537.36',
-                                'accept-language': 'ru,en;q=0.9',
-                                }
+    CATALOG_FILE = None  # Файл каталога городов; None - db/gismeteo_catalog.json в текущем каталоге при создании
+    CATALOG_TTL = 7 * 24 * 3600  # Срок годности сохраненного каталога городов, сек.
+
+    SEL_CATALOG = soupsieve.compile('.catalog_side:last-child .catalog_item a:first-child')
+    SEL_DIARY_LABELS = soupsieve.compile('#cloudness_labels > .label_smallsize, '
+                                         '#precipitations_labels > .label_bigsize')
+    SEL_IMG = soupsieve.compile('img')
+    SEL_TD = soupsieve.compile('td')
+
+    # Общие для процесса каталог городов и подписи значков дневника
+    _cities_catalog = None
+    _diary_labels = dict()
+    _catalog_saved = 0  # Время загрузки каталога городов с сайта
+    _labels_saved = 0  # Время загрузки подписей дневника с сайта
+
+    def __init__(self, catalog_file=None):
+        """
+        :param catalog_file: Файл сохраненного каталога городов, по умолчанию CATALOG_FILE
+        """
+        catalog_file = catalog_file or self.CATALOG_FILE
+        self.catalog_file = pathlib.Path(catalog_file) if catalog_file else \
+            pathlib.Path().absolute() / 'db' / 'gismeteo_catalog.json'
         self.cities_catalog = []  # [{'name': 'Москва', 'link': '/weather-moscow-4368/'}, ...]
-        self.diary_labels = dict()
+        self.diary_labels = WeatherMaker._diary_labels  # {'c3.png': 'Облачно', ...}
         self.daily_forecasts = dict()  # {<class 'datetime.date'>: <class 'Forecast'>, ...}
         self._init_regions_catalog()
         self.city_url = ''
         self.city = ''
 
+    @property
+    def session(self) -> requests.Session:
+        """ Текущая общая сессия HttpTransport: после HttpTransport.configure() используется уже новая сессия """
+        return HttpTransport.session()
+
     @property
     def city_id(self):
-        if self.city_url is None:
+        return self.url_city_id(self.city_url)
+
+    @staticmethod
+    def url_city_id(city_url):
+        """ Идентификатор города из ссылки на страницу прогноза """
+        if city_url is None:
             return
         try:
-            return re.findall(pattern=r'/.*\-(\d*)/', string=self.city_url)[0]
+            return re.findall(pattern=r'/.*\-(\d*)/', string=city_url)[0]
         except IndexError:
             return ''
 
@@ -154,11 +155,57 @@ class WeatherMaker:
             return ''
 
     def _init_regions_catalog(self):
-        """ Собирает список словарей с названиями и ссылками популярных городов России """
-        html = self._beautiful_soup(url=f'{self.SITE}/catalog/russia/')
-        for tag in html.select('.catalog_side:last-child .catalog_item a:first-child'):
-            self.cities_catalog.append({'name': tag.text.strip(),
-                                        'link': tag['href']})
+        """
+        Собирает список словарей с названиями и ссылками популярных городов России.
+        Каталог загружается с сайта один раз на процесс и сохраняется в self.catalog_file вместе с подписями дневника.
+        """
+        if WeatherMaker._cities_catalog is None:
+            self._load_catalog()
+        if WeatherMaker._cities_catalog is None:
+            html = self._beautiful_soup(url=f'{self.SITE}/catalog/russia/')
+            WeatherMaker._cities_catalog = [{'name': tag.text.strip(), 'link': tag['href']}
+                                            for tag in self.SEL_CATALOG.select(html)]
+            WeatherMaker._catalog_saved = time.time()
+            self._save_catalog()
+        self.cities_catalog = WeatherMaker._cities_catalog
+
+    def _load_catalog(self):
+        """
+        Загружает каталог городов и подписи дневника из self.catalog_file.
+        Каждая часть загружается, только если она не старше CATALOG_TTL
+        """
+        try:
+            with open(self.catalog_file, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        if now - data.get('saved', 0) < self.CATALOG_TTL and data.get('cities'):
+            WeatherMaker._cities_catalog = data['cities']
+            WeatherMaker._catalog_saved = data['saved']
+        if now - data.get('labels_saved', 0) < self.CATALOG_TTL and data.get('diary_labels'):
+            self.diary_labels.update(data['diary_labels'])
+            WeatherMaker._labels_saved = data['labels_saved']
+
+    def _save_catalog(self):
+        """
+        Сохраняет каталог городов и подписи дневника в self.catalog_file.
+        Файл записывается во временный и подменяется целиком: процессы-исполнители сохраняют каталог
+        одновременно, и читатель не должен увидеть недописанный файл
+        """
+        temp_file = self.catalog_file.with_name(f'{self.catalog_file.name}.{os.getpid()}.tmp')
+        try:
+            self.catalog_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump({'saved': WeatherMaker._catalog_saved, 'cities': WeatherMaker._cities_catalog or [],
+                           'labels_saved': WeatherMaker._labels_saved, 'diary_labels': self.diary_labels},
+                          file, ensure_ascii=False)
+            os.replace(temp_file, self.catalog_file)
+        except OSError:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
 
     def _beautiful_soup(self, url) -> BeautifulSoup:
         """
@@ -170,17 +217,21 @@ class WeatherMaker:
         response = self.request(url=url)
         return BeautifulSoup(response.text, features='html.parser')
 
-    def _init_forecasts(self, until_date, since_date=datetime.today()):
+    @staticmethod
+    def _init_forecasts(since_date, until_date) -> dict:
         """
-        Создает список объектов Forecast в атрибуте self.forecast заданной длины в диапазоне дат
-        :param datetime.date until_date: Дата - Конец диапазона дней прогнозов
+        Создает словарь объектов Forecast заданной длины в диапазоне дат
         :param datetime.date since_date: Дата - начало диапазона дней прогнозов
+        :param datetime.date until_date: Дата - Конец диапазона дней прогнозов
+        :return dict: Словарь прогнозов: {<class 'datetime.date'>: <class 'Forecast'>, ...}
         """
+        forecasts = dict()
         period_len = (until_date - since_date).days + 1
         for day in range(0, period_len):
             fc = Forecast()
             fc.set_date(since_date + timedelta(day))
-            self.daily_forecasts[since_date + timedelta(day)] = fc
+            forecasts[since_date + timedelta(day)] = fc
+        return forecasts
 
     def _init_diary_labels(self, html):
         """
@@ -189,9 +240,63 @@ class WeatherMaker:
         :param BeautifulSoup html: ОБъект bs4.BeautifulSoup
         """
         if not self.diary_labels:
-            for tag in html.select('#cloudness_labels > .label_smallsize, #precipitations_labels > .label_bigsize'):
-                for img in tag.select('img'):
-                    self.diary_labels[img.get('src').split('/')[-1]] = tag.findNext('dl').text
+            for tag in self.SEL_DIARY_LABELS.select(html):
+                for img in self.SEL_IMG.select(tag):
+                    self.diary_labels[img.get('src').rpartition('/')[2]] = tag.findNext('dl').text
+            if self.diary_labels:
+                WeatherMaker._labels_saved = time.time()
+                self._save_catalog()
+
+    def _fetch_diary_rows(self, url, since_day, until_day) -> str:
+        """
+        Загружает из страницы дневника только HTML строк таблицы с since_day по until_day.
+        Если подписи значков уже известны, текст ответа накапливается только до строки until_day,
+        иначе страница загружается целиком и из нее собираются подписи.
+        Остаток ответа все равно дочитывается без сохранения: иначе закрытие ответа разрывает
+        keep-alive соединение, и следующий запрос платит за новое TCP/TLS-соединение.
+
+        :param str url: Адрес страницы дневника
+        :param int since_day: День начала периода
+        :param int until_day: День окончания периода
+        :return str: HTML-фрагмент со строками <tr>
+        :raises requests.HTTPError: Сайт вернул код ошибки
+        """
+        sleep(self.HUMAN_IMITATE_TIMEOUT)
+        with self.session.get(url=url, timeout=HttpTransport.timeout(), stream=True) as response:
+            response.raise_for_status()
+            response.encoding = response.encoding or 'utf-8'
+            text = ''
+            body = -1
+            chunks = response.iter_content(chunk_size=16384, decode_unicode=True)
+            for chunk in chunks:
+                text += chunk
+                if not self.diary_labels:
+                    continue
+                if body < 0:
+                    body = text.find('<tbody')
+                if body >= 0 and text.count('</tr>', body) >= until_day:
+                    break
+            for _ in chunks:
+                pass
+        if not self.diary_labels:
+            self._init_diary_labels(BeautifulSoup(text, features='html.parser'))
+            body = text.find('<tbody')
+        if body < 0:
+            return ''
+        begin = body
+        for _ in range(since_day - 1):
+            begin = text.find('</tr>', begin)
+            if begin < 0:
+                return ''
+            begin += len('</tr>')
+        end = body
+        for _ in range(until_day):
+            found = text.find('</tr>', end)
+            if found < 0:
+                end = text.find('</tbody>', body)
+                break
+            end = found + len('</tr>')
+        return text[begin:end]
 
     @property
     def latest_forecast_day(self) -> datetime.date:
@@ -231,13 +336,20 @@ class WeatherMaker:
 
         :param str needle_city: Строка искомого города
         """
+        self.city_url, self.city = self.find_city(needle_city=needle_city)
+
+    def find_city(self, needle_city):
+        """
+        Поиск города в каталоге без изменения состояния парсера.
+        Если город не найден, возвращается город по умолчанию.
+
+        :param str needle_city: Строка искомого города
+        :return tuple: (ссылка на страницу прогноза, название города)
+        """
         for city in self.cities_catalog:
             if city['name'].upper() == needle_city.strip().upper():
-                self.city_url = city['link']
-                self.city = city['name']
-                return
-        self.city_url = self.DEFAULT_FORECAST_PAGE
-        self.city = self.DEFAULT_CITY
+                return city['link'], city['name']
+        return self.DEFAULT_FORECAST_PAGE, self.DEFAULT_CITY
 
     def request(self, url) -> requests.Response:
         """
@@ -247,7 +359,7 @@ class WeatherMaker:
         :rtype: requests.Response
         """
         sleep(self.HUMAN_IMITATE_TIMEOUT)
-        return self.session.get(url=url)
+        return self.session.get(url=url, timeout=HttpTransport.timeout())
 
     def get_forecast(self, needle_city, since_date=None, until_date=None) -> dict:
         """
@@ -257,7 +369,23 @@ class WeatherMaker:
         :param str needle_city: Поисковая строка названия города
         :param datetime.date since_date: Начало периода прогноза
         :param datetime.date until_date: Конец периода прогноза
-        :return dict: Словарь прогнозов: {<class 'datetime.date'>: <class 'WeatherMaker'>, ...}
+        :return dict: Словарь прогнозов: {<class 'datetime.date'>: <class 'Forecast'>, ...}
+        """
+        self.daily_forecasts = {forecast.day: forecast
+                                for forecast in self.iter_forecasts(needle_city=needle_city,
+                                                                    since_date=since_date, until_date=until_date)}
+        return self.daily_forecasts
+
+    def iter_forecasts(self, needle_city, since_date=None, until_date=None):
+        """
+        Генератор прогнозов погоды конкретного города за диапазон дат.
+        Прогнозы отдаются по мере разбора страниц (дневник - помесячно, прогноз - одной страницей)
+        и после выдачи не хранятся, поэтому расход памяти не зависит от длины периода.
+
+        :param str needle_city: Поисковая строка названия города
+        :param datetime.date since_date: Начало периода прогноза
+        :param datetime.date until_date: Конец периода прогноза
+        :return: Итератор объектов Forecast в порядке дат
         """
         if since_date is None:
             since_date = datetime.today().date()
@@ -271,25 +399,41 @@ class WeatherMaker:
             until_date = since_date
         elif until_date > self.latest_forecast_day:
             until_date = self.latest_forecast_day
-        self._init_forecasts(since_date=since_date, until_date=until_date)
         # Если весь прогноз на будущее
         if since_date >= yesterday:
-            self.parse_month_page(since_date=since_date, until_date=until_date)
-        # Если весь прогноз из прошлого (дневник)
-        elif until_date < yesterday:
-            self.parse_history_forecasts(since_date=since_date, until_date=until_date)
-        # Если смешанный период
-        elif since_date < yesterday < until_date:
-            self.parse_history_forecasts(since_date=since_date, until_date=yesterday)
-            self.parse_month_page(since_date=datetime.today().date(), until_date=until_date)
-        return self.daily_forecasts
-
-    def parse_month_page(self, since_date, until_date):
+            yield from self._iter_month_page(since_date=since_date, until_date=until_date)
+            return
+        # Прошлое (дневник), затем, если период смешанный, прогноз на будущее
+        history_until = min(until_date, yesterday)
+        for url, year, month in self.diary_urls(since_date=since_date, until_date=history_until):
+            month_since = max(since_date, datetime(year=year, month=month, day=1).date())
+            month_until = min(history_until, (datetime(year=year + month // 12, month=month % 12 + 1, day=1)
+                                              - timedelta(1)).date())
+            forecasts = self._init_forecasts(since_date=month_since, until_date=month_until)
+            self.parse_diary_page(year=year, month=month, since_day=month_since.day, until_day=month_until.day,
+                                  forecasts=forecasts)
+            yield from self._drain(forecasts)
+        if until_date > yesterday:
+            yield from self._iter_month_page(since_date=datetime.today().date(), until_date=until_date)
+
+    def _iter_month_page(self, since_date, until_date):
+        forecasts = self._init_forecasts(since_date=since_date, until_date=until_date)
+        self.parse_month_page(since_date=since_date, until_date=until_date, forecasts=forecasts)
+        yield from self._drain(forecasts)
+
+    @staticmethod
+    def _drain(forecasts):
+        """ Отдает прогнозы в порядке дат, удаляя их из словаря forecasts """
+        for date in sorted(forecasts):
+            yield forecasts.pop(date)
+
+    def parse_month_page(self, since_date, until_date, forecasts):
         """
         Парсит страницу с погодой на месяц
 
         :param datetime.date since_date: Начало периода прогноза
         :param datetime.date until_date: Конец периода прогноза
+        :param dict forecasts: Заполняемый словарь прогнозов на каждый день периода (_init_forecasts)
         """
         html = self._beautiful_soup(url=f'{self.SITE}{self.city_url}{self.PERIOD_MONTH}')
         _date_re = re.compile(pattern=r'(\d+)')
@@ -299,7 +443,7 @@ class WeatherMaker:
         sel_cells = f'.weather-cells .cell:not(.empty):nth-child(n+{sel_first_cell}):nth-child(-n+{sel_last_cell})'
 
         for i, tag in enumerate(html.select(sel_cells)):
-            forecast = self.daily_forecasts[since_date + timedelta(i)]
+            forecast = forecasts[since_date + timedelta(i)]
             forecast.city = self.city
             forecast.city_translit = self.city_translit
             if ', ' in tag.get('data-text', ''):
@@ -311,53 +455,38 @@ class WeatherMaker:
             forecast.day_temp = tag.select('.temp .temp_max .unit_temperature_c')[0].text
             forecast.day_temp = tag.select('.temp .temp_min .unit_temperature_c')[0].text
 
-    def parse_diary_page(self, year, month, since_day=1, until_day=31):
+    def parse_diary_page(self, year, month, forecasts, since_day=1, until_day=31):
         """
         Парсит одну страницу с дневником погоды
         :param int year: год дневника
         :param int month: месяц дневника
         :param int since_day: День начала периода
         :param int until_day: День окончания периода
+        :param dict forecasts: Заполняемый словарь прогнозов на каждый день периода (_init_forecasts)
         """
-        html = self._beautiful_soup(url=self.URL_DIARY.format(self.city_id, year, month))
+        rows = self._fetch_diary_rows(url=self.URL_DIARY.format(self.city_id, year, month),
+                                      since_day=since_day, until_day=until_day)
+        html = BeautifulSoup(rows, features='html.parser')
         since_date = datetime(year=year, month=month, day=since_day)
-        self._init_diary_labels(html)
-        for tr in html.select(f'tbody tr:nth-child(n+{since_day}):nth-child(-n+{until_day})'):
-            cells = tr.select('td')
+        for tr in html.find_all('tr'):
+            cells = self.SEL_TD.select(tr)
             handling_date = since_date.replace(day=int(cells[0].text)).date()
-            forecast = self.daily_forecasts[handling_date]
+            forecast = forecasts[handling_date]
             forecast.city = self.city
             forecast.city_translit = self.city_translit
             try:
-                forecast.cloudiness = self.diary_labels[cells[3].find('img').get('src').split('/')[-1]]
+                forecast.cloudiness = self.diary_labels[cells[3].find('img').get('src').rpartition('/')[2]]
             except AttributeError:
                 pass
             except KeyError as exc:
                 if exc.args[0] == 'still.gif':
-                    self.daily_forecasts.pop(handling_date)
+                    forecasts.pop(handling_date)
                     continue
             if cells[4].contents:
-                forecast.precipitations = self.diary_labels.get(cells[4].find('img').get('src').split('/')[-1], '')
+                forecast.precipitations = self.diary_labels.get(cells[4].find('img').get('src').rpartition('/')[2], '')
             forecast.day_temp = cells[1].text
             forecast.day_temp = cells[6].text
 
-    def parse_history_forecasts(self, since_date, until_date):
-        """
-        Парсит несколько страниц дневника за указанный период
-        :param datetime.date since_date: Начало периода прогноза
-        :param datetime.date until_date: Конец периода прогноза
-        """
-        for url, year, month in self.diary_urls(since_date=since_date, until_date=until_date):
-            if since_date.year == year and since_date.month == month:
-                since_day = since_date.day
-            else:
-                since_day = 1
-            if until_date.year == year and until_date.month == month:
-                until_day = until_date.day
-            else:
-                until_day = 31
-            self.parse_diary_page(year=year, month=month, since_day=since_day, until_day=until_day)
-
 
 if __name__ == '__main__':
     sdate = datetime.strptime('03.02.2020', '%d.%m.%Y').date()
@@ -1,9 +1,17 @@
+import json
+import math
+import multiprocessing
 import pathlib
 import textwrap
+from datetime import datetime
+from functools import lru_cache
+from multiprocessing import shared_memory
 from PIL import ImageFont, Image, ImageDraw
 import cv2
 import numpy as np
 
+import weather_conditions
+
 WORK_DIR = pathlib.Path().absolute()
 IMAGES_DIR = WORK_DIR / 'images'
 
@@ -20,6 +28,185 @@ W_RAINY = 'icon_rainy'
 W_SNOW = 'icon_snow'
 W_CLOUDY = 'icon_cloudy'
 
+# Алфавит открыток: температура, даты, дни недели и подписи облачности/осадков
+POSTCARD_ALPHABET = '0123456789+-\u00B0C., ' + 'АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯабвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+# Изображения в разделяемой памяти, подключенные процессом-исполнителем: {путь: np.array}
+_shared_images = dict()
+
+
+def load_image(path):
+    """
+    Загружает изображение один раз на процесс. Возвращаемый массив нельзя изменять - только копировать
+
+    :param str path: Путь к файлу изображения
+    :rtype: np.array
+    """
+    if path in _shared_images:
+        return _shared_images[path]
+    return _read_image(path)
+
+
+@lru_cache(maxsize=None)
+def _read_image(path):
+    image = cv2.imread(filename=path)
+    image.setflags(write=False)
+    return image
+
+
+@lru_cache(maxsize=None)
+def load_font(path, size):
+    """
+    Загружает шрифт заданного размера один раз на процесс
+
+    :param str path: Путь к файлу шрифта
+    :param int size: Размер шрифта
+    :rtype: ImageFont.FreeTypeFont
+    """
+    return ImageFont.truetype(path, size)
+
+
+class SharedArrays:
+    """
+    Набор массивов NumPy в одном блоке разделяемой памяти.
+    Создатель блока передает handle в другие процессы, те подключаются через attach без копирования данных.
+    """
+
+    def __init__(self, shm, layout, owner):
+        """
+        :param shared_memory.SharedMemory shm: Блок разделяемой памяти
+        :param list layout: [(ключ, форма, dtype, смещение), ...]
+        :param bool owner: Блок создан этим процессом и удаляется при close()
+        """
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {key: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+                       for key, shape, dtype, offset in layout}
+
+    @classmethod
+    def create(cls, arrays):
+        """
+        Копирует массивы в новый блок разделяемой памяти
+
+        :param dict arrays: {ключ: np.array}
+        :rtype: SharedArrays
+        """
+        layout, size = [], 0
+        for key, array in arrays.items():
+            layout.append((key, array.shape, array.dtype.str, size))
+            size += -(-array.nbytes // 64) * 64  # выравнивание по 64 байта
+        shared = cls(shm=shared_memory.SharedMemory(create=True, size=max(size, 1)), layout=layout, owner=True)
+        for key, array in arrays.items():
+            shared.arrays[key][...] = array
+        return shared
+
+    @property
+    def handle(self):
+        """ Описание блока для передачи в другой процесс """
+        return self.shm.name, self.layout
+
+    @classmethod
+    def attach(cls, handle, readonly=True):
+        """
+        Подключение к блоку, созданному другим процессом
+
+        :param tuple handle: Описание блока (SharedArrays.handle)
+        :param bool readonly: Запретить изменение массивов
+        :rtype: SharedArrays
+        """
+        name, layout = handle
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13
+            shm = shared_memory.SharedMemory(name=name)
+        shared = cls(shm=shm, layout=layout, owner=False)
+        if readonly:
+            for array in shared.arrays.values():
+                array.setflags(write=False)
+        return shared
+
+    def close(self):
+        self.arrays = dict()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class GlyphAtlas:
+    """
+    Атлас предварительно отрисованных символов для сочетания (шрифт, размер, цвет).
+    Каждый символ растрируется через FreeType один раз, далее текст собирается
+    альфа-наложением готовых символов средствами NumPy.
+    """
+    _atlases = dict()  # {(font_path, size, color): <class 'GlyphAtlas'>}
+
+    def __init__(self, font_path, size, color):
+        self.font = load_font(font_path, size)
+        self.color = np.array(color, dtype=np.float32)
+        ascent, descent = self.font.getmetrics()
+        self.pad = size // 2
+        self.height = ascent + descent + self.pad
+        self._glyphs = dict()  # {символ: (альфа-маска, маска с цветом, ширина продвижения)}
+
+    @classmethod
+    def get(cls, font_path, size, color):
+        """
+        Атлас для сочетания шрифта, размера и цвета, общий для процесса
+
+        :param str font_path: Путь к файлу шрифта
+        :param int size: Размер шрифта
+        :param tuple color: BGR-цвет текста
+        :rtype: GlyphAtlas
+        """
+        key = (font_path, size, tuple(color))
+        if key not in cls._atlases:
+            cls._atlases[key] = cls(font_path=font_path, size=size, color=color)
+        return cls._atlases[key]
+
+    def glyph(self, char):
+        """
+        Отрисованный символ char: (альфа-маска HxWx1, маска, умноженная на цвет HxWx3, ширина продвижения)
+
+        :param str char: Символ
+        """
+        if char not in self._glyphs:
+            advance = self.font.getlength(char)
+            canvas = Image.new('L', (int(math.ceil(advance)) + 2 * self.pad, self.height))
+            ImageDraw.Draw(canvas).text((self.pad, 0), char, font=self.font, fill=255)
+            alpha = np.asarray(canvas, dtype=np.float32)[:, :, np.newaxis] / 255
+            self._glyphs[char] = (alpha, alpha * self.color, advance)
+        return self._glyphs[char]
+
+    def warm_up(self, alphabet=POSTCARD_ALPHABET):
+        for char in alphabet:
+            self.glyph(char)
+
+    def draw(self, image, text, position):
+        """
+        Наложение текста на изображение
+
+        :param np.array image: Изображение BGR, изменяется на месте
+        :param str text: Текст для размещения
+        :param tuple position: Координаты размещения (x, y)
+        """
+        x, top = position
+        rows, cols = image.shape[:2]
+        for char in text:
+            alpha, colored, advance = self.glyph(char)
+            left = int(round(x)) - self.pad
+            x += advance
+            if char.isspace():
+                continue
+            x0, y0 = max(left, 0), max(top, 0)
+            x1, y1 = min(left + alpha.shape[1], cols), min(top + alpha.shape[0], rows)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            a = alpha[y0 - top:y1 - top, x0 - left:x1 - left]
+            roi = image[y0:y1, x0:x1]
+            roi[:] = np.rint(roi * (1 - a) + colored[y0 - top:y1 - top, x0 - left:x1 - left])
+
 
 class WeatherPostcard:
     """ Класс создания открытки с прогнозом погоды """
@@ -33,6 +220,25 @@ class WeatherPostcard:
         'min_temp':       {'position': (40, 120), 'font_size': 30},
         'precipitations': {'position': (320, 100), 'font_size': 28},
     }
+    # {код состояния погоды: (цвет фона, (y, x) значка на листе иконок)}
+    _conditions = {
+        weather_conditions.CONDITION_THUNDERSTORM:  (COLOR_BLUE_BGR, (147, 306)),
+        weather_conditions.CONDITION_RAIN:          (COLOR_GRAY_BGR, (147, 3829)),
+        weather_conditions.CONDITION_PRECIPITATION: (COLOR_GRAY_BGR, (147, 3829)),
+        weather_conditions.CONDITION_LIGHT:         (COLOR_GRAY_BGR, (147, 3829)),
+        weather_conditions.CONDITION_LIGHT_RAIN:    (COLOR_GRAY_BGR, (147, 4303)),
+        weather_conditions.CONDITION_HEAVY_RAIN:    (COLOR_GRAY_BGR, (147, 3361)),
+        weather_conditions.CONDITION_SNOW:          (COLOR_SKYBLUE_BGR, (147, 537)),
+        weather_conditions.CONDITION_LIGHT_SNOW:    (COLOR_SKYBLUE_BGR, (147, 1474)),
+        weather_conditions.CONDITION_HEAVY_SNOW:    (COLOR_SKYBLUE_BGR, (147, 533)),
+        weather_conditions.CONDITION_SNOW_RAIN:     (COLOR_GRAY_BGR, (147, 2416)),
+        weather_conditions.CONDITION_SLEET:         (COLOR_GRAY_BGR, (147, 2416)),
+        weather_conditions.CONDITION_PARTLY_CLOUDY: (COLOR_YELLOW_BGR, (1165, 782)),
+        weather_conditions.CONDITION_FEW_CLOUDS:    (COLOR_YELLOW_BGR, (1165, 782)),
+        weather_conditions.CONDITION_OVERCAST:      (COLOR_GRAY_BGR, (147, 75)),
+        weather_conditions.CONDITION_CLOUDY:        (COLOR_GRAY_BGR, (147, 75)),
+        weather_conditions.CONDITION_CLEAR:         (COLOR_YELLOW_BGR, (485, 320)),
+    }
     _font_colors = {
         COLOR_YELLOW_BGR:  {'left': (64, 114, 183), 'right': (156, 124, 27)},
         COLOR_BLUE_BGR:    {'left': COLOR_WHITE, 'right': (115, 89, 49)},
@@ -40,8 +246,14 @@ class WeatherPostcard:
         COLOR_GRAY_BGR:    {'left': (105, 102, 91), 'right': (105, 102, 91)},
     }
 
-    def __init__(self, font=None):
-        self.image = cv2.imread(filename=self._template)
+    _bases = dict()  # {(код состояния погоды, размер холста): фон открытки}
+
+    def __init__(self, font=None, image=None):
+        """
+        :param str font: Путь к файлу шрифта
+        :param np.array image: Холст для отрисовки (например, ячейка в разделяемой памяти), по умолчанию копия шаблона
+        """
+        self.image = load_image(self._template).copy() if image is None else image
         self.weather_icon = None
         self.background_color = COLOR_WHITE
         try:
@@ -53,47 +265,57 @@ class WeatherPostcard:
 
     def init_postcard(self, precipitations):
         """
-        Инициализация открытки:
+        Инициализация открытки: копия готового фона (градиент и значок) для состояния погоды
+
+        :param precipitations: Код состояния погоды (weather_conditions) или его подпись
+        """
+        if isinstance(precipitations, int):
+            code = precipitations
+        else:
+            code = weather_conditions.code_of(precipitations)
+        if code not in self._conditions:
+            code = weather_conditions.CONDITION_CLEAR
+        self.background_color = self._conditions[code][0]
+        np.copyto(self.image, self.base_image(code=code, shape=self.image.shape))
+
+    @classmethod
+    def base_image(cls, code, shape):
+        """
+        Фон открытки (шаблон с градиентом и значком) для состояния погоды из кэша.
+        Фон одинаков для всех открыток с этим состоянием, отличается только текст.
+
+        :param int code: Код состояния погоды (weather_conditions)
+        :param tuple shape: Размер холста
+        :rtype: np.array
+        """
+        key = (code, tuple(shape))
+        if key not in cls._bases:
+            postcard = cls()
+            if postcard.image.shape != key[1]:
+                postcard.image = cv2.resize(postcard.image, (shape[1], shape[0]))
+            postcard.compose_base(code=code)
+            postcard.image.setflags(write=False)
+            cls._bases[key] = postcard.image
+        return cls._bases[key]
+
+    @classmethod
+    def warm_up_bases(cls):
+        """ Заполняет кэш фонов для всех состояний погоды """
+        shape = load_image(cls._template).shape
+        for code in cls._conditions:
+            cls.base_image(code=code, shape=shape)
+
+    def compose_base(self, code):
+        """
+        Отрисовка фона открытки на self.image:
            - создание шаблона с цветным градиентом
            - вырезание иконки погоды
            - объединение шаблона и иконки
-        """
-        precipitations = precipitations.lower().strip()
-        icons = cv2.imread(filename=self._icons)
-        if precipitations == 'гроза':
-            self.background_color = COLOR_BLUE_BGR
-            y, x = 147, 306
-        elif precipitations in ('дождь', 'осадки', 'небольшой'):
-            self.background_color = COLOR_GRAY_BGR
-            y, x = 147, 3829
-        elif precipitations == 'небольшой дождь':
-            self.background_color = COLOR_GRAY_BGR
-            y, x = 147, 4303
-        elif precipitations == 'сильный дождь':
-            self.background_color = COLOR_GRAY_BGR
-            y, x = 147, 3361
-        elif precipitations == 'снег':
-            self.background_color = COLOR_SKYBLUE_BGR
-            y, x = 147, 537
-        elif precipitations == 'небольшой снег':
-            self.background_color = COLOR_SKYBLUE_BGR
-            y, x = 147, 1474
-        elif precipitations == 'сильный снег':
-            self.background_color = COLOR_SKYBLUE_BGR
-            y, x = 147, 533
-        elif precipitations in ('снег с дождём', 'мокрый снег'):
-            self.background_color = COLOR_GRAY_BGR
-            y, x = 147, 2416
-        elif precipitations in ('переменная облачность', 'малооблачно'):
-            self.background_color = COLOR_YELLOW_BGR
-            y, x = 1165, 782
-        elif precipitations in ('пасмурно', 'облачно'):
-            self.background_color = COLOR_GRAY_BGR
-            y, x = 147, 75
-        else:  # Ясно
-            self.background_color = COLOR_YELLOW_BGR
-            y, x = 485, 320
 
+        :param int code: Код состояния погоды (weather_conditions)
+        """
+        self.background_color, (y, x) = self._conditions[code]
+        icons = load_image(self._icons)
         _icon = icons[y:y + self._icon_height, x:x + self._icon_width]  # (158, 141, 3)
         _t_img = np.zeros((190, 296, 3), dtype=np.uint8)
         _t_img[_t_img.shape[0] - _icon.shape[0]:_t_img.shape[0],
@@ -136,14 +358,25 @@ class WeatherPostcard:
 
     def write_text(self, text, color=COLOR_GRAY_BGR, size=10, position=(0, 0)):
         """
-        Написание текста через библиотеку PIL
+        Написание текста наложением символов из атласа GlyphAtlas
+
+        :param str text: Текст для размещения
+        :param tuple color: BGR-цвет текста
+        :param int size: Размер шрифта
+        :param tuple position: Координаты размещения (x, y)
+        """
+        GlyphAtlas.get(font_path=self.font_path, size=size, color=color).draw(self.image, text, position)
+
+    def write_text_pil(self, text, color=COLOR_GRAY_BGR, size=10, position=(0, 0)):
+        """
+        Написание текста через библиотеку PIL (эталон для проверки атласа)
 
         :param str text: Текст для размещения
         :param tuple color: BGR-цвет текста
         :param int size: Размер шрифта
         :param tuple position: Координаты размещения (x, y)
         """
-        font = ImageFont.truetype(self.font_path, size)
+        font = load_font(self.font_path, size)
         img_pil = Image.fromarray(self.image)
         draw = ImageDraw.Draw(img_pil)
         draw.text(position, text, font=font, fill=color)
@@ -190,6 +423,49 @@ class WeatherPostcard:
                             position=(x, y))
             y += self._areas['precipitations']['font_size']
 
+    @classmethod
+    def warm_up_atlases(cls, font=None):
+        """ Предварительная отрисовка алфавита открыток для всех размеров и цветов текста """
+        font_path = cls(font=font).font_path
+        for area in cls._areas.values():
+            for colors in cls._font_colors.values():
+                for color in set(colors.values()):
+                    GlyphAtlas.get(font_path=font_path, size=area['font_size'], color=color).warm_up()
+
+    @classmethod
+    def from_forecast(cls, forecast, font=None, image=None):
+        """
+        Создает готовую открытку по прогнозу погоды
+
+        :param weather_maker.Forecast forecast: Прогноз на дату
+        :param str font: Путь к файлу шрифта
+        :param np.array image: Холст для отрисовки, по умолчанию копия шаблона
+        :rtype: WeatherPostcard
+        """
+        postcard = cls(font=font, image=image)
+        postcard.init_postcard(precipitations=forecast.precipitations or forecast.cloudiness)
+        postcard.append_date(f'{forecast.date}, {forecast.week_day}')
+        postcard.append_max_temp(forecast.day_temp_max)
+        postcard.append_min_temp(forecast.day_temp_min)
+        postcard.append_precipitations(forecast.cloud_precip)
+        return postcard
+
+    @staticmethod
+    def file_name(forecast):
+        """
+        Имя файла открытки вида <Город>_<гггг-мм-дд>.png
+
+        :param weather_maker.Forecast forecast: Прогноз на дату
+        :rtype: str
+        """
+        _date = datetime.strptime(forecast.date, '%d.%m.%Y').strftime('%Y-%m-%d')
+        return f'{forecast.city_translit.capitalize()}_{_date}.png'
+
+    def to_png(self) -> bytes:
+        """ Открытка, закодированная в PNG """
+        ok, buffer = cv2.imencode('.png', self.image)
+        return buffer.tobytes()
+
     def show_image(self):
         """ Показать открытку """
         cv2.namedWindow(winname=self.__class__.__name__, flags=cv2.WINDOW_AUTOSIZE)
@@ -212,6 +488,192 @@ class WeatherPostcard:
         cv2.destroyAllWindows()
 
 
+class PostcardSheet:
+    """
+    Лист открыток: открытки за период на одном изображении, по неделе в строке (Пн - Вс).
+    Изображение кодируется один раз, индекс смещений открыток позволяет использовать лист как CSS-спрайт.
+    """
+    WEEK_LEN = 7
+
+    def __init__(self, forecasts, font=None):
+        """
+        :param dict forecasts: Словарь прогнозов: {<class 'datetime.date'>: <class 'Forecast'>, ...}
+        :param str font: Путь к файлу шрифта
+        """
+        self.forecasts = dict(sorted(forecasts.items()))
+        self.font = font
+        self.image = None
+        self.index = []  # [{'date': '08.03.2020', 'x': 0, 'y': 0, 'width': 600, 'height': 300}, ...]
+
+    def render(self, pool=None):
+        """
+        Размещает открытки в заранее выделенном холсте
+
+        :param PostcardRenderPool pool: Пул процессов: холст создается в разделяемой памяти,
+                                        исполнители рисуют открытки прямо в свои ячейки
+        """
+        if not self.forecasts:
+            return
+        card_height, card_width = load_image(WeatherPostcard._template).shape[:2]
+        first_date = next(iter(self.forecasts))
+        first_monday = first_date.toordinal() - first_date.weekday()
+        weeks = (next(reversed(self.forecasts)).toordinal() - first_monday) // self.WEEK_LEN + 1
+        shape = (weeks * card_height, self.WEEK_LEN * card_width, 3)
+        shared = None
+        if pool is None:
+            self.image = np.full(shape, 255, dtype=np.uint8)
+        else:
+            shared = SharedArrays.create({'sheet': np.full(shape, 255, dtype=np.uint8)})
+            self.image = shared.arrays['sheet']
+        self.index = []
+        cells = []
+        for date, forecast in self.forecasts.items():
+            x = date.weekday() * card_width
+            y = (date.toordinal() - first_monday) // self.WEEK_LEN * card_height
+            cell = (slice(y, y + card_height), slice(x, x + card_width))
+            if pool is None:
+                WeatherPostcard.from_forecast(forecast, font=self.font, image=self.image[cell])
+            else:
+                cells.append((cell, forecast))
+            self.index.append({'date': forecast.date, 'x': x, 'y': y, 'width': card_width, 'height': card_height})
+        if shared is not None:
+            pool.render_into(shared=shared, key='sheet', cells=cells)
+            self.image = self.image.copy()
+            shared.close()
+
+    def save_file(self, path, index_path=None):
+        """
+        Сохраняет лист открыток и, при необходимости, JSON-индекс смещений открыток
+
+        :param path: Путь к файлу изображения
+        :param index_path: Путь к файлу индекса
+        """
+        if self.image is None:
+            self.render()
+        if self.image is None:
+            return
+        cv2.imwrite(filename=str(path), img=self.image)
+        if index_path is not None:
+            with open(index_path, 'w', encoding='utf-8') as file:
+                json.dump({'image': pathlib.Path(path).name, 'cards': self.index}, file, ensure_ascii=False)
+
+
+# Состояние процесса-исполнителя PostcardRenderPool
+_worker_font = None
+_worker_buffers = dict()  # {имя блока разделяемой памяти: SharedArrays}
+
+
+def _init_render_worker(assets_handle, font):
+    """
+    Подключает шаблон, лист значков и кэш фонов из разделяемой памяти вместо чтения с диска
+
+    :param tuple assets_handle: SharedArrays.handle блока ресурсов
+    :param str font: Путь к файлу шрифта
+    """
+    global _worker_font
+    _worker_font = font
+    assets = SharedArrays.attach(assets_handle)
+    _worker_buffers[assets.shm.name] = assets
+    for key, array in assets.arrays.items():
+        if key[0] == 'image':
+            _shared_images[key[1]] = array
+        else:
+            WeatherPostcard._bases[key[1:]] = array
+
+
+def _render_task(task):
+    """
+    Рисует открытку прямо в ячейку буфера в разделяемой памяти
+
+    :param tuple task: (SharedArrays.handle, ключ массива, индекс ячейки, Forecast, держать ли буфер подключенным)
+    """
+    handle, key, cell, forecast, keep = task
+    name = handle[0]
+    shared = _worker_buffers.get(name) or SharedArrays.attach(handle, readonly=False)
+    postcard = WeatherPostcard.from_forecast(forecast, font=_worker_font, image=shared.arrays[key][cell])
+    del postcard
+    if keep:
+        _worker_buffers[name] = shared
+    elif name not in _worker_buffers:
+        shared.close()
+    return cell
+
+
+class PostcardRenderPool:
+    """
+    Параллельная отрисовка открыток пулом процессов без передачи изображений через pickle.
+    Шаблон, лист значков и фоны один раз размещаются в разделяемой памяти и подключаются исполнителями
+    только для чтения; готовые открытки исполнители пишут прямо в заранее выделенные слоты,
+    которые родительский процесс читает без копирования.
+    """
+
+    def __init__(self, workers=None, font=None, slots=None):
+        """
+        :param int workers: Количество процессов, по умолчанию - по числу ядер
+        :param str font: Путь к файлу шрифта
+        :param int slots: Количество слотов для открыток, по умолчанию 2 на процесс
+        """
+        self.workers = workers or multiprocessing.cpu_count()
+        WeatherPostcard.warm_up_bases()
+        template = load_image(WeatherPostcard._template)
+        assets = {('image', WeatherPostcard._template): template,
+                  ('image', WeatherPostcard._icons): load_image(WeatherPostcard._icons)}
+        assets.update({('base', ) + key: base for key, base in WeatherPostcard._bases.items()})
+        self.assets = SharedArrays.create(assets)
+        slots = slots or self.workers * 2
+        self.slab = SharedArrays.create({'cards': np.zeros((slots, ) + template.shape, dtype=np.uint8)})
+        self.pool = multiprocessing.Pool(processes=self.workers, initializer=_init_render_worker,
+                                         initargs=(self.assets.handle, font))
+
+    def render_into(self, shared, key, cells):
+        """
+        Рисует открытки в ячейки массива shared.arrays[key]
+
+        :param SharedArrays shared: Буфер в разделяемой памяти, созданный родительским процессом
+        :param key: Ключ массива в буфере
+        :param list cells: [(индекс ячейки, Forecast), ...]
+        """
+        self.pool.map(_render_task, [(shared.handle, key, cell, forecast, False) for cell, forecast in cells])
+
+    def render(self, forecasts):
+        """
+        Генератор готовых открыток. Изображение - представление слота разделяемой памяти
+        и действительно только до следующей итерации (нужно закодировать или скопировать).
+
+        :param dict forecasts: Словарь прогнозов: {<class 'datetime.date'>: <class 'Forecast'>, ...}
+        :return: Итератор кортежей (Forecast, np.array)
+        """
+        cards = self.slab.arrays['cards']
+        items = list(forecasts.values())
+        for begin in range(0, len(items), len(cards)):
+            batch = items[begin:begin + len(cards)]
+            tasks = [(self.slab.handle, 'cards', slot, forecast, True) for slot, forecast in enumerate(batch)]
+            for slot in self.pool.imap(_render_task, tasks):
+                yield batch[slot], cards[slot]
+
+    def save_files(self, forecasts, path):
+        """
+        Отрисовка и сохранение открыток в каталог path
+
+        :param dict forecasts: Словарь прогнозов
+        :param pathlib.Path path: Каталог для открыток
+        """
+        for forecast, image in self.render(forecasts):
+            cv2.imwrite(filename=str(path / WeatherPostcard.file_name(forecast)), img=image)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+        self.slab.close()
+        self.assets.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 if __name__ == '__main__':
     postcard = WeatherPostcard()
     postcard.init_postcard(precipitations='снег')
@@ -222,4 +684,12 @@ if __name__ == '__main__':
     # postcard.show_image()
     postcard.save_file(path='2020-03-14_Kirov.png')
 
+    # Сравнение атласа с отрисовкой PIL: максимальное отклонение канала пикселя
+    for text in ('08.03.2020, Вс', '+9\u00B0C', '-14\u00B0C', 'Переменная облачность'):
+        atlas_card, pil_card = WeatherPostcard(), WeatherPostcard()
+        atlas_card.write_text(text=text, color=COLOR_BLACK, size=30, position=(10, 10))
+        pil_card.write_text_pil(text=text, color=COLOR_BLACK, size=30, position=(10, 10))
+        deviation = np.abs(atlas_card.image.astype(np.int16) - pil_card.image.astype(np.int16)).max()
+        print(f'{text}: максимальное отклонение от PIL {deviation}')
+
 
@@ -0,0 +1,218 @@
+import argparse
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from weather_maker import WeatherMaker
+from database_updater import WeatherDatabase
+import weather_postcard
+
+DATE_FORMAT = '%d.%m.%Y'
+
+
+class InFlight:
+    """
+    Объединение одинаковых одновременных запросов:
+    пока запрос с ключом key выполняется, остальные потоки с тем же ключом ждут его результат.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = dict()  # {key: [threading.Event, результат, исключение]}
+
+    def run(self, key, func):
+        """
+        Выполняет func() один раз для всех одновременных вызовов с ключом key
+
+        :param key: Хешируемый ключ запроса
+        :param func: Функция без аргументов
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+        if leader:
+            try:
+                call[1] = func()
+            except Exception as exc:
+                call[2] = exc
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call[0].set()
+        else:
+            call[0].wait()
+        if call[2] is not None:
+            raise call[2]
+        return call[1]
+
+
+class WeatherService:
+    """
+    Долгоживущий сервис прогнозов и открыток.
+    Каталог городов, соединение с БД, кэш чтения БД, шрифты и значки загружаются один раз при старте.
+    """
+    FORECAST_TTL = 3600  # Время жизни в памяти прогнозов на будущие даты, сек.
+
+    def __init__(self):
+        self.weather = WeatherMaker()  # только поиск по каталогу городов; загрузку выполняет отдельный парсер
+        # Обращения к БД идут по одному под _db_lock, поэтому все потоки сервера используют одно соединение
+        self.db = WeatherDatabase(thread_safe=False)
+        self.in_flight = InFlight()
+        self._scrape_lock = threading.Lock()  # загрузки с сайта выполняются по одной
+        self._db_lock = threading.Lock()
+        self._forecasts_lock = threading.Lock()
+        self._forecasts = dict()  # {(city_id, since_date, until_date): (время получения, {date: Forecast})}
+
+    def warm_up(self):
+        """ Загружает ресурсы открыток заранее, чтобы первый запрос не платил за их чтение """
+        weather_postcard.load_image(weather_postcard.WeatherPostcard._template)
+        weather_postcard.load_image(weather_postcard.WeatherPostcard._icons)
+        weather_postcard.WeatherPostcard.warm_up_atlases()
+        weather_postcard.WeatherPostcard.warm_up_bases()
+
+    def forecasts(self, city, since_date, until_date) -> dict:
+        """
+        Прогнозы за диапазон дат: из БД, если все дни уже прошли и сохранены, иначе с сайта с сохранением в БД
+
+        :param str city: Название города
+        :param datetime.date since_date: Начало периода прогноза
+        :param datetime.date until_date: Конец периода прогноза
+        :return dict: Словарь прогнозов: {<class 'datetime.date'>: <class 'Forecast'>, ...}
+        """
+        city_id = WeatherMaker.url_city_id(self.weather.find_city(needle_city=city)[0])
+        key = (city_id, since_date, until_date)
+        return self.in_flight.run(key, lambda: self._collect(city, city_id, since_date, until_date))
+
+    def _collect(self, city, city_id, since_date, until_date):
+        period_len = (until_date - since_date).days + 1
+        if until_date < datetime.today().date():
+            with self._db_lock:
+                forecasts = self.db.get_period_forecasts(city_id=city_id, since_date=since_date,
+                                                         until_date=until_date)
+            if len(forecasts) == period_len:
+                return forecasts
+        with self._forecasts_lock:
+            cached = self._forecasts.get((city_id, since_date, until_date))
+        if cached is not None and time.monotonic() - cached[0] < self.FORECAST_TTL:
+            return cached[1]
+        # Ответы из БД и из памяти не ждут загрузку: блокировка берется только на время обращения к сайту
+        with self._scrape_lock:
+            scraper = WeatherMaker()
+            forecasts = dict(scraper.get_forecast(needle_city=city, since_date=since_date, until_date=until_date))
+            city_name = scraper.city
+        rows = [dict(city_id=city_id, city=city_name, city_translit=forecast.city_translit, wdate=date,
+                     **forecast.to_dict())
+                for date, forecast in forecasts.items()]
+        with self._db_lock:
+            self.db.weather_upsert_rows(rows)
+        now = time.monotonic()
+        with self._forecasts_lock:
+            for expired in [k for k, (stamp, _) in self._forecasts.items() if now - stamp >= self.FORECAST_TTL]:
+                self._forecasts.pop(expired, None)
+            self._forecasts[(city_id, since_date, until_date)] = (now, forecasts)
+        return forecasts
+
+    def postcard(self, city, date) -> bytes:
+        """
+        Открытка с прогнозом на дату в формате PNG
+
+        :param str city: Название города
+        :param datetime.date date: Дата прогноза
+        :rtype: bytes
+        """
+        def render():
+            forecast = self.forecasts(city=city, since_date=date, until_date=date).get(date)
+            if forecast is None:
+                return None
+            return weather_postcard.WeatherPostcard.from_forecast(forecast).to_png()
+
+        return self.in_flight.run(('postcard', city.strip().upper(), date), render)
+
+    @staticmethod
+    def forecast_to_dict(forecast):
+        return {'date': forecast.date, 'week_day': forecast.week_day, 'city': forecast.city,
+                'max_temp': forecast.day_temp_max, 'min_temp': forecast.day_temp_min,
+                'cloudiness': forecast.cloudiness, 'precipitations': forecast.precipitations}
+
+
+class WeatherRequestHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик запросов:
+      GET /forecast?city=Москва&sdate=01.03.2020&udate=07.03.2020  - прогноз в формате JSON
+      GET /postcard?city=Москва&date=01.03.2020                    - открытка в формате PNG
+    """
+    service = None  # WeatherService, устанавливается при запуске сервера
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == '/forecast':
+                since_date = self._date(params, 'sdate')
+                until_date = self._date(params, 'udate', default=since_date)
+                forecasts = self.service.forecasts(city=params.get('city', ''),
+                                                   since_date=since_date, until_date=until_date)
+                body = json.dumps([self.service.forecast_to_dict(forecast)
+                                   for _, forecast in sorted(forecasts.items())], ensure_ascii=False)
+                self._send(200, body.encode('utf-8'), 'application/json; charset=utf-8')
+            elif url.path == '/postcard':
+                png = self.service.postcard(city=params.get('city', ''), date=self._date(params, 'date'))
+                if png is None:
+                    self._send(404, 'Прогноз на дату отсутствует'.encode('utf-8'), 'text/plain; charset=utf-8')
+                else:
+                    self._send(200, png, 'image/png')
+            else:
+                self._send(404, b'Not found', 'text/plain')
+        except ValueError as exc:
+            self._send(400, str(exc).encode('utf-8'), 'text/plain; charset=utf-8')
+        except requests.RequestException as exc:
+            self.log_error('Ошибка запроса к сайту прогнозов: %r', exc)
+            self._send(502, 'Сайт прогнозов недоступен'.encode('utf-8'), 'text/plain; charset=utf-8')
+        except Exception as exc:
+            self.log_error('Ошибка обработки запроса: %r', exc)
+            self._send(500, 'Внутренняя ошибка сервиса'.encode('utf-8'), 'text/plain; charset=utf-8')
+
+    @staticmethod
+    def _date(params, name, default=None):
+        if name not in params:
+            if default is not None:
+                return default
+            return datetime.today().date()
+        return datetime.strptime(params[name], DATE_FORMAT).date()
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host='127.0.0.1', port=8080):
+    """ Запуск HTTP-сервиса прогнозов """
+    service = WeatherService()
+    service.warm_up()
+    WeatherRequestHandler.service = service
+    server = ThreadingHTTPServer((host, port), WeatherRequestHandler)
+    print(f'Сервис прогнозов погоды: http://{host}:{port}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-host', type=str, default='127.0.0.1', help='Адрес сервиса')
+    parser.add_argument('-port', type=int, default=8080, help='Порт сервиса')
+    args = parser.parse_args()
+    serve(host=args.host, port=args.port)